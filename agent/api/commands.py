@@ -5,11 +5,15 @@ and read-back verification of input operations.
 """
 
 import asyncio
+import concurrent.futures
+import heapq
 import logging
 import time
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Coroutine, Optional
+from typing import Annotated, Any, Callable, Coroutine, Literal, Optional, Union
+
+from pydantic import BaseModel, BeforeValidator, Field, TypeAdapter, ValidationError
 
 from ..control import input as input_control
 from ..control import verify as input_verify
@@ -17,16 +21,22 @@ from ..control import verify as input_verify
 logger = logging.getLogger(__name__)
 
 
-class CommandStatus(Enum):
-    """Status of a command in the queue."""
+class CommandStatus(str, Enum):
+    """Status of a command in the queue.
+
+    str-backed so members serialize directly without a .value hop.
+    """
     QUEUED = "queued"
     RUNNING = "running"
     SUCCEEDED = "succeeded"
     FAILED = "failed"
 
 
-class CommandType(Enum):
-    """Types of commands that can be executed."""
+class CommandType(str, Enum):
+    """Types of commands that can be executed.
+
+    str-backed so members serialize directly without a .value hop.
+    """
     CLICK = "click"
     DOUBLE_CLICK = "double_click"
     RIGHT_CLICK = "right_click"
@@ -40,7 +50,12 @@ class CommandType(Enum):
     SCROLL = "scroll"
 
 
-@dataclass
+# Plain dict lookup for string -> member conversion; CommandType(s) goes
+# through the enum metaclass __call__ on every call.
+_CMD_TYPE_BY_STR: dict[str, CommandType] = {t.value: t for t in CommandType}
+
+
+@dataclass(slots=True)
 class CommandResult:
     """Result of a command execution."""
     success: bool
@@ -49,33 +64,199 @@ class CommandResult:
     executed_at: Optional[float] = None
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class Command:
-    """Represents a command in the queue."""
+    """Represents a command in the queue.
+
+    Instances are identity-compared and slotted: the processing loop
+    touches these attributes constantly, and per-instance __dict__
+    overhead adds up across thousands of commands.
+    """
     id: str
     type: CommandType
     session_id: str
-    params: dict[str, Any]
+    # The validated per-type pydantic model (e.g. _ClickCmd); handlers read
+    # typed attributes off it instead of probing a params dict.
+    params: BaseModel
     status: CommandStatus = CommandStatus.QUEUED
     result: Optional[CommandResult] = None
-    created_at: float = field(default_factory=time.time)
-    started_at: Optional[float] = None
-    completed_at: Optional[float] = None
+    created_at: float = 0.0  # wall clock, exposed via to_dict
+    # Internal timing uses the monotonic clock (ints, immune to clock skew);
+    # only created_at needs wall-clock meaning for API consumers.
+    started_ns: Optional[int] = None
+    completed_ns: Optional[int] = None
+    # Set by the processing loop when this command is part of a drained batch
+    # and a later command in the batch will perform the state verification.
+    defer_verify: bool = False
+    # Memoized to_dict() payload; cleared on every status transition so
+    # repeated polls of a settled command rebuild nothing.
+    _cached_dict: Optional[dict[str, Any]] = field(
+        default=None, init=False, repr=False, compare=False,
+    )
+
+    def invalidate_cache(self) -> None:
+        """Drop the memoized API dict after a state change."""
+        self._cached_dict = None
 
     def to_dict(self) -> dict[str, Any]:
         """Convert command to dictionary for API response."""
+        cached = self._cached_dict
+        if cached is not None:
+            return cached
         response = {
             "id": self.id,
-            "type": self.type.value,
-            "status": self.status.value,
+            "type": self.type,
+            "status": self.status,
             "created_at": self.created_at,
         }
         if self.result:
             response["result"] = self.result.data
             response["error"] = self.result.error
+        self._cached_dict = response
         return response
 
 
+# =============================================================================
+# Command schema - one pydantic model per command type, validated in one shot
+# through a discriminated union so the per-field checks run in pydantic-core
+# instead of interpreted Python.
+# =============================================================================
+
+def _to_coord(value: Any) -> Any:
+    """Coerce a numeric coordinate to int, rejecting non-numbers."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("must be a number")
+    return int(value)
+
+
+_Coord = Annotated[int, BeforeValidator(_to_coord)]
+
+
+class _ClickCmd(BaseModel):
+    id: str
+    type: Literal["click"]
+    x: _Coord
+    y: _Coord
+    button: str = "left"
+
+
+class _DoubleClickCmd(BaseModel):
+    id: str
+    type: Literal["double_click"]
+    x: _Coord
+    y: _Coord
+
+
+class _RightClickCmd(BaseModel):
+    id: str
+    type: Literal["right_click"]
+    x: _Coord
+    y: _Coord
+
+
+class _MoveCmd(BaseModel):
+    id: str
+    type: Literal["move"]
+    x: _Coord
+    y: _Coord
+
+
+class _DragCmd(BaseModel):
+    id: str
+    type: Literal["drag"]
+    start_x: _Coord
+    start_y: _Coord
+    end_x: _Coord
+    end_y: _Coord
+    button: str = "left"
+    duration: float = 0.5
+    steps: int = 20
+
+
+class _TypeCmd(BaseModel):
+    id: str
+    type: Literal["type"]
+    text: str
+    interval: float = 0.0
+
+
+class _HotkeyCmd(BaseModel):
+    id: str
+    type: Literal["hotkey"]
+    keys: list[Any] = Field(min_length=1)
+
+
+class _KeyDownCmd(BaseModel):
+    id: str
+    type: Literal["key_down"]
+    key: str
+
+
+class _KeyUpCmd(BaseModel):
+    id: str
+    type: Literal["key_up"]
+    key: str
+
+
+class _KeyPressCmd(BaseModel):
+    id: str
+    type: Literal["key_press"]
+    key: str
+
+
+class _ScrollCmd(BaseModel):
+    id: str
+    type: Literal["scroll"]
+    delta: int
+    x: Optional[_Coord] = None
+    y: Optional[_Coord] = None
+    horizontal: bool = False
+
+
+_COMMAND_ADAPTER: TypeAdapter = TypeAdapter(
+    list[
+        Annotated[
+            Union[
+                _ClickCmd,
+                _DoubleClickCmd,
+                _RightClickCmd,
+                _MoveCmd,
+                _DragCmd,
+                _TypeCmd,
+                _HotkeyCmd,
+                _KeyDownCmd,
+                _KeyUpCmd,
+                _KeyPressCmd,
+                _ScrollCmd,
+            ],
+            Field(discriminator="type"),
+        ]
+    ]
+)
+
+def _invalid_command_message(
+    exc: ValidationError,
+    commands: list[dict[str, Any]],
+) -> str:
+    """Translate the first pydantic error into this module's message style."""
+    err = exc.errors()[0]
+    loc = err.get("loc", ())
+    index = loc[0] if loc and isinstance(loc[0], int) else None
+    cmd_data = commands[index] if index is not None and index < len(commands) else {}
+    cmd_id = cmd_data.get("id", "?")
+
+    if err["type"] == "union_tag_invalid":
+        return f"Invalid command type '{cmd_data.get('type')}' for command {cmd_id}"
+
+    field_name = loc[-1] if len(loc) > 1 else "?"
+    if err["type"] == "missing":
+        return (
+            f"Command {cmd_id} of type '{cmd_data.get('type')}' "
+            f"requires '{field_name}' field"
+        )
+    return f"Command {cmd_id}: '{field_name}' {err['msg']}"
+
+
 class CommandError(Exception):
     """Base exception for command errors."""
     pass
@@ -101,27 +282,49 @@ class CommandQueue:
 
     MAX_QUEUE_SIZE = 1000
     COMMAND_TIMEOUT = 30.0  # seconds
+    BATCH_DRAIN_LIMIT = 16  # max commands drained per wakeup for verify coalescing
+    EVENT_FLUSH_DELAY = 0.005  # seconds to buffer command_done events for coalescing
 
-    def __init__(self):
-        """Initialize the command queue."""
+    def __init__(self, coalesce_moves: bool = True):
+        """Initialize the command queue.
+
+        Args:
+            coalesce_moves: Collapse runs of consecutive MOVE commands in a
+                drained batch into the final move, since only the last
+                destination affects cursor state. Pass False for clients
+                that need every intermediate move injected.
+        """
+        self._coalesce_moves = coalesce_moves
         self._queue: asyncio.Queue[Command] = asyncio.Queue(maxsize=self.MAX_QUEUE_SIZE)
         self._commands: dict[str, Command] = {}
+        # Auxiliary indices so session teardown and cleanup touch only the
+        # affected commands instead of scanning the full history.
+        self._by_session: dict[str, set[str]] = {}
+        self._completed_heap: list[tuple[int, str]] = []
         self._executor: Optional[Callable[[Command], Coroutine[Any, Any, CommandResult]]] = None
         self._processing = False
         self._process_task: Optional[asyncio.Task] = None
+        self._stop_event = asyncio.Event()
+        self._on_stop: Optional[Callable[[], None]] = None
         self._event_callback: Optional[Callable[[str, dict], Coroutine[Any, Any, None]]] = None
+        self._event_buffer: list[dict[str, Any]] = []
+        self._event_flush_handle: Optional[asyncio.TimerHandle] = None
 
     def set_executor(
         self,
         executor: Callable[[Command], Coroutine[Any, Any, CommandResult]],
+        on_stop: Optional[Callable[[], None]] = None,
     ) -> None:
         """
         Set the command executor function.
 
         Args:
             executor: Async function that executes a command and returns a result.
+            on_stop: Optional cleanup called when processing stops (e.g. to
+                shut down the executor's thread pool).
         """
         self._executor = executor
+        self._on_stop = on_stop
 
     def set_event_callback(
         self,
@@ -154,169 +357,64 @@ class CommandQueue:
             InvalidCommandError: If a command is invalid.
             CommandError: If the queue is full.
         """
-        queued_ids = []
-
+        if not commands:
+            return []
+
+        # Phase 1: validate the whole batch up front, so nothing is
+        # enqueued if any command in it is rejected. Ids and duplicates
+        # are pre-checked on the raw dicts to keep the specific error
+        # messages; field validation runs as one pydantic-core call.
+        ids: list[str] = []
         for cmd_data in commands:
-            # Validate required fields
             cmd_id = cmd_data.get("id")
-            cmd_type_str = cmd_data.get("type")
-
             if not cmd_id:
                 raise InvalidCommandError("Command missing 'id' field")
-            if not cmd_type_str:
+            if not cmd_data.get("type"):
                 raise InvalidCommandError(f"Command {cmd_id} missing 'type' field")
+            ids.append(cmd_id)
 
-            # Validate command type
-            try:
-                cmd_type = CommandType(cmd_type_str)
-            except ValueError:
-                raise InvalidCommandError(
-                    f"Invalid command type '{cmd_type_str}' for command {cmd_id}"
-                )
+        # Duplicate detection as set operations instead of per-command probes.
+        id_set = set(ids)
+        if len(id_set) != len(ids):
+            raise InvalidCommandError("Duplicate command ID within batch")
+        conflicts = id_set & self._commands.keys()
+        if conflicts:
+            raise InvalidCommandError(f"Duplicate command ID: {next(iter(conflicts))}")
 
-            # Validate command parameters
-            self._validate_command_params(cmd_id, cmd_type, cmd_data)
+        try:
+            models = _COMMAND_ADAPTER.validate_python(commands)
+        except ValidationError as e:
+            raise InvalidCommandError(_invalid_command_message(e, commands)) from None
 
-            # Create command object
-            command = Command(
-                id=cmd_id,
-                type=cmd_type,
+        now = time.time()
+        new_commands = [
+            Command(
+                id=model.id,
+                type=_CMD_TYPE_BY_STR[model.type],
                 session_id=session_id,
-                params=self._extract_params(cmd_type, cmd_data),
+                params=model,
+                created_at=now,
             )
+            for model in models
+        ]
 
-            # Check for duplicate ID
-            if cmd_id in self._commands:
-                raise InvalidCommandError(f"Duplicate command ID: {cmd_id}")
+        # Pre-flight capacity check: one integer compare for the whole batch,
+        # so the puts below cannot raise QueueFull.
+        if self._queue.qsize() + len(new_commands) > self.MAX_QUEUE_SIZE:
+            raise CommandError("Command queue is full")
 
-            # Add to queue
-            try:
-                self._queue.put_nowait(command)
-            except asyncio.QueueFull:
-                raise CommandError("Command queue is full")
-
-            self._commands[cmd_id] = command
-            queued_ids.append(cmd_id)
+        # Phase 2: enqueue in one tight loop with no per-command async
+        # machinery or exception handling beyond the synchronous put.
+        queued_ids = []
+        session_ids = self._by_session.setdefault(session_id, set())
+        for command in new_commands:
+            self._queue.put_nowait(command)
+            self._commands[command.id] = command
+            session_ids.add(command.id)
+            queued_ids.append(command.id)
 
         return queued_ids
 
-    def _validate_command_params(
-        self,
-        cmd_id: str,
-        cmd_type: CommandType,
-        cmd_data: dict[str, Any],
-    ) -> None:
-        """Validate command parameters based on type."""
-        if cmd_type in (
-            CommandType.CLICK,
-            CommandType.DOUBLE_CLICK,
-            CommandType.RIGHT_CLICK,
-            CommandType.MOVE,
-        ):
-            if "x" not in cmd_data or "y" not in cmd_data:
-                raise InvalidCommandError(
-                    f"Command {cmd_id} of type {cmd_type.value} requires 'x' and 'y' coordinates"
-                )
-            if not isinstance(cmd_data["x"], (int, float)):
-                raise InvalidCommandError(f"Command {cmd_id}: 'x' must be a number")
-            if not isinstance(cmd_data["y"], (int, float)):
-                raise InvalidCommandError(f"Command {cmd_id}: 'y' must be a number")
-
-        elif cmd_type == CommandType.TYPE:
-            if "text" not in cmd_data:
-                raise InvalidCommandError(
-                    f"Command {cmd_id} of type 'type' requires 'text' field"
-                )
-            if not isinstance(cmd_data["text"], str):
-                raise InvalidCommandError(f"Command {cmd_id}: 'text' must be a string")
-
-        elif cmd_type == CommandType.HOTKEY:
-            if "keys" not in cmd_data:
-                raise InvalidCommandError(
-                    f"Command {cmd_id} of type 'hotkey' requires 'keys' field"
-                )
-            if not isinstance(cmd_data["keys"], list):
-                raise InvalidCommandError(f"Command {cmd_id}: 'keys' must be a list")
-            if len(cmd_data["keys"]) == 0:
-                raise InvalidCommandError(f"Command {cmd_id}: 'keys' cannot be empty")
-
-        elif cmd_type in (CommandType.KEY_DOWN, CommandType.KEY_UP):
-            if "key" not in cmd_data:
-                raise InvalidCommandError(
-                    f"Command {cmd_id} of type '{cmd_type.value}' requires 'key' field"
-                )
-
-        elif cmd_type == CommandType.SCROLL:
-            if "delta" not in cmd_data:
-                raise InvalidCommandError(
-                    f"Command {cmd_id} of type 'scroll' requires 'delta' field"
-                )
-
-        elif cmd_type == CommandType.DRAG:
-            required = ["start_x", "start_y", "end_x", "end_y"]
-            for field in required:
-                if field not in cmd_data:
-                    raise InvalidCommandError(
-                        f"Command {cmd_id} of type 'drag' requires '{field}' field"
-                    )
-                if not isinstance(cmd_data[field], (int, float)):
-                    raise InvalidCommandError(f"Command {cmd_id}: '{field}' must be a number")
-
-        elif cmd_type == CommandType.KEY_PRESS:
-            if "key" not in cmd_data:
-                raise InvalidCommandError(
-                    f"Command {cmd_id} of type 'key_press' requires 'key' field"
-                )
-
-    def _extract_params(
-        self,
-        cmd_type: CommandType,
-        cmd_data: dict[str, Any],
-    ) -> dict[str, Any]:
-        """Extract relevant parameters based on command type."""
-        params: dict[str, Any] = {}
-
-        if cmd_type in (
-            CommandType.CLICK,
-            CommandType.DOUBLE_CLICK,
-            CommandType.RIGHT_CLICK,
-            CommandType.MOVE,
-        ):
-            params["x"] = int(cmd_data["x"])
-            params["y"] = int(cmd_data["y"])
-            if cmd_type == CommandType.CLICK:
-                params["button"] = cmd_data.get("button", "left")
-
-        elif cmd_type == CommandType.TYPE:
-            params["text"] = cmd_data["text"]
-            params["interval"] = cmd_data.get("interval", 0.0)
-
-        elif cmd_type == CommandType.HOTKEY:
-            params["keys"] = cmd_data["keys"]
-
-        elif cmd_type in (CommandType.KEY_DOWN, CommandType.KEY_UP):
-            params["key"] = cmd_data["key"]
-
-        elif cmd_type == CommandType.SCROLL:
-            params["delta"] = int(cmd_data["delta"])
-            params["x"] = int(cmd_data.get("x", 0)) if cmd_data.get("x") is not None else None
-            params["y"] = int(cmd_data.get("y", 0)) if cmd_data.get("y") is not None else None
-            params["horizontal"] = cmd_data.get("horizontal", False)
-
-        elif cmd_type == CommandType.DRAG:
-            params["start_x"] = int(cmd_data["start_x"])
-            params["start_y"] = int(cmd_data["start_y"])
-            params["end_x"] = int(cmd_data["end_x"])
-            params["end_y"] = int(cmd_data["end_y"])
-            params["button"] = cmd_data.get("button", "left")
-            params["duration"] = cmd_data.get("duration", 0.5)
-            params["steps"] = cmd_data.get("steps", 20)
-
-        elif cmd_type == CommandType.KEY_PRESS:
-            params["key"] = cmd_data["key"]
-
-        return params
-
     def get_status(self, command_id: str) -> Command:
         """
         Get the status of a command.
@@ -344,16 +442,13 @@ class CommandQueue:
 
         Returns:
             The result of the command execution.
-        """
-        if not self._executor:
-            return CommandResult(
-                success=False,
-                error="No executor configured",
-                executed_at=time.time(),
-            )
 
+        The executor must already be set (start_processing enforces this);
+        callers invoking execute() directly share that precondition.
+        """
         command.status = CommandStatus.RUNNING
-        command.started_at = time.time()
+        command.started_ns = time.monotonic_ns()
+        command.invalidate_cache()
 
         try:
             result = await asyncio.wait_for(
@@ -374,66 +469,199 @@ class CommandQueue:
             )
 
         command.result = result
-        command.completed_at = time.time()
+        command.completed_ns = time.monotonic_ns()
         command.status = CommandStatus.SUCCEEDED if result.success else CommandStatus.FAILED
+        command.invalidate_cache()
+        heapq.heappush(self._completed_heap, (command.completed_ns, command.id))
 
-        # Fire completion event
+        # Fire completion event (buffered so bursts coalesce into one emit)
         if self._event_callback:
-            try:
-                await self._event_callback(
-                    "command_done",
-                    {
-                        "id": command.id,
-                        "status": command.status.value,
-                        "result": result.data,
-                        "error": result.error,
-                    },
-                )
-            except Exception:
-                pass  # Don't fail command due to callback error
+            self._schedule_event({
+                "id": command.id,
+                "status": command.status,
+                "result": result.data,
+                "error": result.error,
+            })
+            # Flush immediately when nothing else is pending so the last
+            # event of a burst is not held back by the flush delay. Commands
+            # with defer_verify set have batch-mates right behind them, so
+            # their events stay buffered.
+            if not command.defer_verify and self._queue.qsize() == 0:
+                await self._flush_events()
 
         return result
 
+    def _schedule_event(self, event: dict[str, Any]) -> None:
+        """Buffer a completion event and arm the delayed flush."""
+        self._event_buffer.append(event)
+        if self._event_flush_handle is None:
+            self._event_flush_handle = asyncio.get_event_loop().call_later(
+                self.EVENT_FLUSH_DELAY,
+                lambda: asyncio.ensure_future(self._flush_events()),
+            )
+
+    async def _flush_events(self) -> None:
+        """Emit buffered completion events as one callback invocation."""
+        if self._event_flush_handle is not None:
+            self._event_flush_handle.cancel()
+            self._event_flush_handle = None
+
+        events, self._event_buffer = self._event_buffer, []
+        if not events or not self._event_callback:
+            return
+
+        try:
+            if len(events) == 1:
+                await self._event_callback("command_done", events[0])
+            else:
+                await self._event_callback("command_done_batch", {"items": events})
+        except Exception:
+            pass  # Don't fail commands due to callback error
+
     async def start_processing(self) -> None:
-        """Start the background command processing loop."""
+        """Start the background command processing loop.
+
+        Raises:
+            RuntimeError: If no executor has been set.
+        """
         if self._processing:
             return
+        if self._executor is None:
+            raise RuntimeError("Cannot start processing: executor not set")
 
         self._processing = True
+        self._stop_event.clear()
         self._process_task = asyncio.create_task(self._process_loop())
 
     async def stop_processing(self) -> None:
         """Stop the background command processing loop."""
         self._processing = False
+        self._stop_event.set()
+        await self._flush_events()
         if self._process_task:
-            self._process_task.cancel()
             try:
                 await self._process_task
             except asyncio.CancelledError:
                 pass
             self._process_task = None
+        if self._on_stop:
+            try:
+                self._on_stop()
+            except Exception:
+                logger.warning("Executor cleanup failed", exc_info=True)
 
     async def _process_loop(self) -> None:
-        """Background loop that processes commands from the queue."""
-        while self._processing:
-            try:
-                # Wait for a command with timeout to allow checking _processing flag
-                try:
-                    command = await asyncio.wait_for(
-                        self._queue.get(),
-                        timeout=1.0,
-                    )
-                except asyncio.TimeoutError:
-                    continue
+        """Background loop that processes commands from the queue.
 
-                await self.execute(command)
-                self._queue.task_done()
+        Commands that arrive in a burst are drained together so that
+        state verification (cursor/foreground probes) runs once at the
+        end of the batch instead of after every command.
 
-            except asyncio.CancelledError:
-                break
-            except Exception:
-                # Log error but continue processing
-                continue
+        Shutdown is signalled via the stop event rather than a polling
+        timeout, so the loop performs no wakeups while idle.
+        """
+        stop_task = asyncio.create_task(self._stop_event.wait())
+        get_task: Optional[asyncio.Task] = None
+
+        try:
+            while self._processing:
+                if get_task is None:
+                    get_task = asyncio.create_task(self._queue.get())
+
+                done, _ = await asyncio.wait(
+                    {get_task, stop_task},
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if get_task not in done:
+                    # Only the stop event fired; nothing was dequeued.
+                    break
+
+                # The stop event may have fired in the same round as the
+                # dequeue. Execute the command first - dropping it here
+                # would leave it QUEUED forever with task_done never
+                # called - then honor the stop below.
+                command = get_task.result()
+                get_task = None
+
+                # Drain any commands already queued behind this one; only the
+                # last command of the batch performs full verification.
+                batch = [command]
+                while len(batch) < self.BATCH_DRAIN_LIMIT:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+
+                if self._coalesce_moves and len(batch) > 1:
+                    batch = self._coalesce_move_runs(batch)
+
+                for cmd in batch[:-1]:
+                    cmd.defer_verify = True
+
+                try:
+                    for cmd in batch:
+                        await self.execute(cmd)
+                        self._queue.task_done()
+                except asyncio.CancelledError:
+                    break
+                except Exception:
+                    # Log error but continue processing
+                    pass
+
+                if stop_task in done:
+                    break
+        finally:
+            stop_task.cancel()
+            if get_task is not None:
+                get_task.cancel()
+
+    def _coalesce_move_runs(self, batch: list[Command]) -> list[Command]:
+        """Collapse runs of consecutive MOVE commands into the final move.
+
+        Intermediate moves in a run never affect observable state - only
+        the last destination matters - so they are completed without
+        injection. Each dropped command still succeeds and still fires
+        its completion event, with ``coalesced_into`` pointing at the
+        move that was actually executed, so clients see no missing IDs.
+        """
+        kept: list[Command] = []
+        i = 0
+        n = len(batch)
+        while i < n:
+            cmd = batch[i]
+            if cmd.type == CommandType.MOVE:
+                last = i
+                while last + 1 < n and batch[last + 1].type == CommandType.MOVE:
+                    last += 1
+                for dropped in batch[i:last]:
+                    self._complete_coalesced(dropped, batch[last].id)
+                kept.append(batch[last])
+                i = last + 1
+            else:
+                kept.append(cmd)
+                i += 1
+        return kept
+
+    def _complete_coalesced(self, command: Command, into_id: str) -> None:
+        """Mark a coalesced-away move as succeeded without executing it."""
+        command.result = CommandResult(
+            success=True,
+            data={"coalesced_into": into_id},
+            executed_at=time.time(),
+        )
+        command.completed_ns = time.monotonic_ns()
+        command.status = CommandStatus.SUCCEEDED
+        command.invalidate_cache()
+        heapq.heappush(self._completed_heap, (command.completed_ns, command.id))
+        self._queue.task_done()
+
+        if self._event_callback:
+            self._schedule_event({
+                "id": command.id,
+                "status": command.status,
+                "result": command.result.data,
+                "error": None,
+            })
 
     def get_pending_count(self) -> int:
         """Get the number of pending commands in the queue."""
@@ -449,18 +677,30 @@ class CommandQueue:
         Returns:
             Number of commands cleared.
         """
-        now = time.time()
-        to_remove = []
-
-        for cmd_id, command in self._commands.items():
-            if command.status in (CommandStatus.SUCCEEDED, CommandStatus.FAILED):
-                if command.completed_at and (now - command.completed_at) > max_age:
-                    to_remove.append(cmd_id)
-
-        for cmd_id in to_remove:
+        now_ns = time.monotonic_ns()
+        max_age_ns = int(max_age * 1e9)
+        removed = 0
+
+        while self._completed_heap and (now_ns - self._completed_heap[0][0]) > max_age_ns:
+            _, cmd_id = heapq.heappop(self._completed_heap)
+            command = self._commands.get(cmd_id)
+            if command is None:
+                continue
+            if command.status not in (CommandStatus.SUCCEEDED, CommandStatus.FAILED):
+                continue
             del self._commands[cmd_id]
+            self._discard_from_session(command)
+            removed += 1
 
-        return len(to_remove)
+        return removed
+
+    def _discard_from_session(self, command: Command) -> None:
+        """Remove a command from its session index."""
+        session_ids = self._by_session.get(command.session_id)
+        if session_ids is not None:
+            session_ids.discard(command.id)
+            if not session_ids:
+                del self._by_session[command.session_id]
 
     def cancel_session_commands(self, session_id: str) -> int:
         """
@@ -473,22 +713,42 @@ class CommandQueue:
             Number of commands cancelled.
         """
         cancelled = 0
-        for command in self._commands.values():
-            if (
-                command.session_id == session_id
-                and command.status == CommandStatus.QUEUED
-            ):
-                command.status = CommandStatus.FAILED
-                command.result = CommandResult(
-                    success=False,
-                    error="Session ended",
-                    executed_at=time.time(),
-                )
-                command.completed_at = time.time()
-                cancelled += 1
+        for cmd_id in self._by_session.get(session_id, ()):
+            command = self._commands.get(cmd_id)
+            if command is None or command.status != CommandStatus.QUEUED:
+                continue
+            command.status = CommandStatus.FAILED
+            command.result = CommandResult(
+                success=False,
+                error="Session ended",
+                executed_at=time.time(),
+            )
+            command.completed_ns = time.monotonic_ns()
+            command.invalidate_cache()
+            heapq.heappush(self._completed_heap, (command.completed_ns, cmd_id))
+            cancelled += 1
         return cancelled
 
 
+# How each command type is verified after injection: "cursor" re-reads the
+# cursor position (done inline by the move/drag handlers, where it doubles as
+# the success check), "quick" probes cursor + foreground window, and "none"
+# skips verification for keys/scroll whose post-state is transient anyway.
+_VERIFY_STRATEGY: dict[CommandType, str] = {
+    CommandType.CLICK: "quick",
+    CommandType.DOUBLE_CLICK: "quick",
+    CommandType.RIGHT_CLICK: "quick",
+    CommandType.MOVE: "cursor",
+    CommandType.DRAG: "cursor",
+    CommandType.TYPE: "quick",
+    CommandType.HOTKEY: "quick",
+    CommandType.KEY_DOWN: "none",
+    CommandType.KEY_UP: "none",
+    CommandType.KEY_PRESS: "quick",
+    CommandType.SCROLL: "none",
+}
+
+
 # =============================================================================
 # Command Executor - Executes commands using Win32 SendInput
 # =============================================================================
@@ -505,7 +765,33 @@ class CommandExecutor:
         """Initialize the command executor."""
         self._controller = None
         self._input_error = None
-        
+
+        # Dedicated single worker for input injection: SendInput targets the
+        # shared system input queue and must be serialized anyway, and using
+        # our own pool keeps input latency independent of whatever else is
+        # running on the loop's default executor (screen capture, file I/O).
+        self._exec_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="sendinput",
+        )
+
+        # Dispatch table built once; execute() does a single dict lookup
+        # per command instead of rebuilding this mapping every call.
+        self._handlers = {
+            CommandType.CLICK: self._handle_click,
+            CommandType.DOUBLE_CLICK: self._handle_double_click,
+            CommandType.RIGHT_CLICK: self._handle_right_click,
+            CommandType.MOVE: self._handle_move,
+            CommandType.DRAG: self._handle_drag,
+            CommandType.TYPE: self._handle_type,
+            CommandType.HOTKEY: self._handle_hotkey,
+            CommandType.KEY_DOWN: self._handle_key_down,
+            CommandType.KEY_UP: self._handle_key_up,
+            CommandType.KEY_PRESS: self._handle_key_press,
+            CommandType.SCROLL: self._handle_scroll,
+        }
+
+
         if input_control.is_input_available():
             try:
                 self._controller = input_control.get_controller()
@@ -516,6 +802,22 @@ class CommandExecutor:
             self._input_error = input_control.get_input_error()
             logger.warning(f"Input control not available: {self._input_error}")
 
+        # Spin the worker thread up now so the first command does not pay
+        # thread-start latency.
+        self._exec_pool.submit(input_control.is_input_available)
+
+    def close(self) -> None:
+        """Shut down the input worker thread."""
+        self._exec_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _capture_verify(self, cmd_type: CommandType, verify: bool) -> Optional[dict]:
+        """Capture post-command verification data per the type's strategy."""
+        if _VERIFY_STRATEGY.get(cmd_type, "quick") == "none":
+            return None
+        if not verify:
+            return {"verify_deferred": True}
+        return input_verify.quick_verify()
+
     async def execute(self, command: Command) -> CommandResult:
         """
         Execute a command and return the result.
@@ -536,7 +838,7 @@ class CommandExecutor:
         
         try:
             # Execute the command based on type
-            handler = self._get_handler(command.type)
+            handler = self._handlers.get(command.type)
             if not handler:
                 return CommandResult(
                     success=False,
@@ -547,9 +849,10 @@ class CommandExecutor:
             # Run the command (blocking operations run in thread pool)
             loop = asyncio.get_event_loop()
             result = await loop.run_in_executor(
-                None,
+                self._exec_pool,
                 handler,
                 command.params,
+                not command.defer_verify,
             )
 
             return result
@@ -562,33 +865,11 @@ class CommandExecutor:
                 executed_at=time.time(),
             )
 
-    def _get_handler(self, cmd_type: CommandType):
-        """Get the handler function for a command type."""
-        handlers = {
-            CommandType.CLICK: self._handle_click,
-            CommandType.DOUBLE_CLICK: self._handle_double_click,
-            CommandType.RIGHT_CLICK: self._handle_right_click,
-            CommandType.MOVE: self._handle_move,
-            CommandType.DRAG: self._handle_drag,
-            CommandType.TYPE: self._handle_type,
-            CommandType.HOTKEY: self._handle_hotkey,
-            CommandType.KEY_DOWN: self._handle_key_down,
-            CommandType.KEY_UP: self._handle_key_up,
-            CommandType.KEY_PRESS: self._handle_key_press,
-            CommandType.SCROLL: self._handle_scroll,
-        }
-        return handlers.get(cmd_type)
-
-    def _handle_click(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_click(self, params: _ClickCmd, verify: bool = True) -> CommandResult:
         """Handle click command."""
-        x = params["x"]
-        y = params["y"]
-        button = params.get("button", "left")
+        result = self._controller.click(params.x, params.y, button=params.button)
 
-        result = self._controller.click(x, y, button=button)
-
-        # Verify and return
-        verify_data = input_verify.quick_verify()
+        verify_data = self._capture_verify(CommandType.CLICK, verify)
         return CommandResult(
             success=result.success,
             data=verify_data,
@@ -596,14 +877,11 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_double_click(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_double_click(self, params: _DoubleClickCmd, verify: bool = True) -> CommandResult:
         """Handle double-click command."""
-        x = params["x"]
-        y = params["y"]
-
-        result = self._controller.double_click(x, y)
+        result = self._controller.double_click(params.x, params.y)
 
-        verify_data = input_verify.quick_verify()
+        verify_data = self._capture_verify(CommandType.DOUBLE_CLICK, verify)
         return CommandResult(
             success=result.success,
             data=verify_data,
@@ -611,14 +889,11 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_right_click(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_right_click(self, params: _RightClickCmd, verify: bool = True) -> CommandResult:
         """Handle right-click command."""
-        x = params["x"]
-        y = params["y"]
-
-        result = self._controller.right_click(x, y)
+        result = self._controller.right_click(params.x, params.y)
 
-        verify_data = input_verify.quick_verify()
+        verify_data = self._capture_verify(CommandType.RIGHT_CLICK, verify)
         return CommandResult(
             success=result.success,
             data=verify_data,
@@ -626,15 +901,13 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_move(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_move(self, params: _MoveCmd, verify: bool = True) -> CommandResult:
         """Handle mouse move command."""
-        x = params["x"]
-        y = params["y"]
+        result = self._controller.move(params.x, params.y)
 
-        result = self._controller.move(x, y)
-
-        # Verify cursor position
-        verify_result = input_verify.verify_cursor_position(x, y)
+        # Cursor verification doubles as the success check, so it runs
+        # even when batch verification is deferred.
+        verify_result = input_verify.verify_cursor_position(params.x, params.y)
         verify_data = verify_result.to_dict()
 
         return CommandResult(
@@ -644,21 +917,21 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_drag(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_drag(self, params: _DragCmd, verify: bool = True) -> CommandResult:
         """Handle drag command."""
         result = self._controller.drag(
-            start_x=params["start_x"],
-            start_y=params["start_y"],
-            end_x=params["end_x"],
-            end_y=params["end_y"],
-            button=params.get("button", "left"),
-            duration=params.get("duration", 0.5),
-            steps=params.get("steps", 20),
+            start_x=params.start_x,
+            start_y=params.start_y,
+            end_x=params.end_x,
+            end_y=params.end_y,
+            button=params.button,
+            duration=params.duration,
+            steps=params.steps,
         )
 
         # Verify final cursor position
         verify_result = input_verify.verify_cursor_position(
-            params["end_x"], params["end_y"]
+            params.end_x, params.end_y
         )
         verify_data = verify_result.to_dict()
 
@@ -669,14 +942,11 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_type(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_type(self, params: _TypeCmd, verify: bool = True) -> CommandResult:
         """Handle type text command."""
-        text = params["text"]
-        interval = params.get("interval", 0.0)
-
-        result = self._controller.type_text(text, interval=interval)
+        result = self._controller.type_text(params.text, interval=params.interval)
 
-        verify_data = input_verify.quick_verify()
+        verify_data = self._capture_verify(CommandType.TYPE, verify)
         return CommandResult(
             success=result.success,
             data=verify_data,
@@ -684,13 +954,11 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_hotkey(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_hotkey(self, params: _HotkeyCmd, verify: bool = True) -> CommandResult:
         """Handle hotkey command."""
-        keys = params["keys"]
-
-        result = self._controller.hotkey(*keys)
+        result = self._controller.hotkey(*params.keys)
 
-        verify_data = input_verify.quick_verify()
+        verify_data = self._capture_verify(CommandType.HOTKEY, verify)
         return CommandResult(
             success=result.success,
             data=verify_data,
@@ -698,13 +966,11 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_key_down(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_key_down(self, params: _KeyDownCmd, verify: bool = True) -> CommandResult:
         """Handle key down command."""
-        key = params["key"]
+        result = self._controller.key_down(params.key)
 
-        result = self._controller.key_down(key)
-
-        verify_data = input_verify.quick_verify()
+        verify_data = self._capture_verify(CommandType.KEY_DOWN, verify)
         return CommandResult(
             success=result.success,
             data=verify_data,
@@ -712,13 +978,11 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_key_up(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_key_up(self, params: _KeyUpCmd, verify: bool = True) -> CommandResult:
         """Handle key up command."""
-        key = params["key"]
-
-        result = self._controller.key_up(key)
+        result = self._controller.key_up(params.key)
 
-        verify_data = input_verify.quick_verify()
+        verify_data = self._capture_verify(CommandType.KEY_UP, verify)
         return CommandResult(
             success=result.success,
             data=verify_data,
@@ -726,13 +990,11 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_key_press(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_key_press(self, params: _KeyPressCmd, verify: bool = True) -> CommandResult:
         """Handle key press command."""
-        key = params["key"]
-
-        result = self._controller.key_press(key)
+        result = self._controller.key_press(params.key)
 
-        verify_data = input_verify.quick_verify()
+        verify_data = self._capture_verify(CommandType.KEY_PRESS, verify)
         return CommandResult(
             success=result.success,
             data=verify_data,
@@ -740,16 +1002,13 @@ class CommandExecutor:
             executed_at=time.time(),
         )
 
-    def _handle_scroll(self, params: dict[str, Any]) -> CommandResult:
+    def _handle_scroll(self, params: _ScrollCmd, verify: bool = True) -> CommandResult:
         """Handle scroll command."""
-        delta = params["delta"]
-        x = params.get("x")
-        y = params.get("y")
-        horizontal = params.get("horizontal", False)
-
-        result = self._controller.scroll(delta, x=x, y=y, horizontal=horizontal)
+        result = self._controller.scroll(
+            params.delta, x=params.x, y=params.y, horizontal=params.horizontal
+        )
 
-        verify_data = input_verify.quick_verify()
+        verify_data = self._capture_verify(CommandType.SCROLL, verify)
         return CommandResult(
             success=result.success,
             data=verify_data,
@@ -767,5 +1026,5 @@ def create_command_queue() -> CommandQueue:
     """
     queue = CommandQueue()
     executor = CommandExecutor()
-    queue.set_executor(executor.execute)
+    queue.set_executor(executor.execute, on_stop=executor.close)
     return queue
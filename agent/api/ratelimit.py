@@ -0,0 +1,382 @@
+"""Token bucket rate limiting for the Lily Remote API.
+
+This module is the per-request hot kernel: every HTTP request and
+WebSocket message runs through `RateLimiter.check_rate_limit`. It is
+kept free of FastAPI/Starlette imports so `setup.py build_ext` can
+optionally compile it to a C extension with Cython (the same treatment
+as agent/api/commands.py); the pure-Python module is used unchanged
+when the toolchain is absent.
+"""
+
+import collections
+import ipaddress
+import socket
+import time
+from dataclasses import dataclass
+from typing import Optional, Union
+
+# Bound once at module scope: skips the time-module attribute lookup in
+# per-request hot paths.
+_monotonic = time.monotonic
+
+
+@dataclass
+class RateLimitConfig:
+    """Configuration for rate limiting."""
+    # Global rate limits
+    requests_per_minute: int = 120  # Max requests per minute per IP
+    requests_per_second: int = 10   # Max requests per second per IP
+
+    # Endpoint-specific limits
+    pairing_per_minute: int = 5     # Max pairing attempts per minute per IP
+    commands_per_second: int = 20   # Max command batches per second per session
+    websocket_messages_per_second: int = 30  # Max WS messages per second
+
+    # Burst allowance
+    burst_multiplier: float = 1.5   # Allow short bursts up to this multiplier
+
+    def __post_init__(self):
+        # Pre-bake per-endpoint (rate, burst) pairs so the hot path never
+        # recomputes divisions or burst sizes per request.
+        # Bursts are clamped to >= 1 so a misconfigured (zero/negative)
+        # multiplier still admits a first request instead of denying
+        # everything forever.
+        self.global_rate = float(self.requests_per_second)
+        self.global_burst = max(1, int(self.requests_per_second * self.burst_multiplier))
+        self.pairing_rate = self.pairing_per_minute / 60.0
+        self.pairing_burst = 2
+        self.command_rate = float(self.commands_per_second)
+        self.command_burst = max(1, int(self.commands_per_second * self.burst_multiplier))
+        self.websocket_rate = float(self.websocket_messages_per_second)
+        self.websocket_burst = max(1, int(self.websocket_messages_per_second * self.burst_multiplier))
+
+
+class _Bucket:
+    """GCRA state: theoretical arrival time, a consecutive-deny count,
+    and the monotonic time of the last check against this bucket. The
+    eviction sweep compares `touched` against a deque entry's timestamp
+    directly; inferring touch time from `tat` breaks down once the
+    deny-streak penalty pushes the TAT past any real activity."""
+
+    __slots__ = ("tat", "deny_streak", "touched")
+
+    def __init__(self, tat: float):
+        self.tat = tat
+        self.deny_streak = 0
+        self.touched = tat
+
+
+def _ip_key(ip: str) -> Union[int, str]:
+    """Pack an IP string into its integer form for use as a bucket key.
+
+    Integers hash in-place in CPython while strings hash their whole
+    buffer, and an int key stores in ~28 bytes vs 50+ for an IPv4/IPv6
+    string. Malformed input (e.g. the "unknown" placeholder) falls back
+    to the string itself.
+    """
+    try:
+        # IPv4 fast path
+        return int.from_bytes(socket.inet_aton(ip), "big")
+    except OSError:
+        try:
+            return int(ipaddress.ip_address(ip))
+        except ValueError:
+            return ip
+
+
+def _presized_table(n: int = 1024) -> "dict[str, _Bucket]":
+    """Return an empty dict whose hash table is pre-grown for ~n keys.
+
+    CPython grows a dict's table on insert but never shrinks it on
+    delete, so filling and emptying once leaves the capacity in place.
+    Avoids a cascade of resize pauses while the first wave of client
+    IPs trickles in.
+    """
+    table: dict = {}
+    for i in range(n):
+        table[i] = None
+    for i in range(n):
+        del table[i]
+    return table
+
+
+class RateLimiter:
+    """
+    GCRA (Generic Cell Rate Algorithm) rate limiter for API endpoints.
+
+    Implements per-IP and per-endpoint rate limiting with configurable
+    limits and burst allowance. Equivalent to a token bucket — the same
+    burst is admitted at the same sustained rate — but each bucket is a
+    single theoretical-arrival-time float instead of (tokens, timestamp),
+    so a check is one compare and one add with no refill math.
+
+    Lock-free: the read-modify-write of a bucket contains no await, so
+    the event loop cannot interleave another task into it — acquiring a
+    lock around it would be pure overhead on every request.
+
+    Deliberately unsharded: sharding the bucket tables buys contention
+    relief and bounded cleanup scans, but there is exactly one event
+    loop touching them and eviction is already amortized through the
+    touch deques (O(evictions), never a full-table scan), so a shard
+    layer would only add an extra index per check.
+    """
+
+    BUCKET_MAX_AGE = 300.0  # Evict buckets idle for 5 minutes
+    DENY_STREAK_THRESHOLD = 5  # Consecutive denials before penalties kick in
+    MAX_PENALTY_HORIZON = 60.0  # Cap how far past now a penalized TAT may sit
+    MAX_EVICTIONS_PER_CHECK = 64  # Bound stale-entry sweeping per request
+    MAX_BUCKETS = 4096  # Hard cap per table; oldest-touched evicted beyond it
+
+    def __init__(self, config: Optional[RateLimitConfig] = None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            config: Rate limiting configuration.
+        """
+        self._config = config or RateLimitConfig()
+        # One bucket table (plus touch deque) per endpoint class. Separate
+        # dicts mean the key is the bare IP/session/client id — no
+        # "global:..." f-string allocation and hash per check.
+        self._global_buckets: dict[str, _Bucket] = _presized_table()
+        self._pairing_buckets: dict[str, _Bucket] = _presized_table()
+        self._command_buckets: dict[str, _Bucket] = _presized_table()
+        self._ws_buckets: dict[str, _Bucket] = _presized_table()
+        # (touched_at, key) pairs in touch order; stale entries are popped
+        # from the left a few at a time, so eviction work is proportional
+        # to the number of evictions rather than the live bucket count.
+        self._global_lru: collections.deque[tuple[float, str]] = collections.deque()
+        self._pairing_lru: collections.deque[tuple[float, str]] = collections.deque()
+        self._command_lru: collections.deque[tuple[float, str]] = collections.deque()
+        self._ws_lru: collections.deque[tuple[float, str]] = collections.deque()
+
+    def _allow(
+        self,
+        buckets: "dict[Union[int, str], _Bucket]",
+        lru: "collections.deque[tuple[float, Union[int, str]]]",
+        key: Union[int, str],
+        limit_per_second: float,
+        burst_size: int,
+        now: Optional[float] = None,
+    ) -> tuple[bool, float]:
+        """
+        Check if a request is within rate limits.
+
+        Args:
+            buckets: Bucket table for the endpoint class being checked.
+            lru: Touch deque paired with that table.
+            key: Unique identifier for the rate limit bucket (packed IP
+                int or session/client id string).
+            limit_per_second: Maximum requests per second.
+            burst_size: Maximum burst size (precomputed by RateLimitConfig).
+            now: Pre-read monotonic timestamp, so combined checks share
+                one clock read. Read here when not supplied.
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds).
+        """
+        # No lock: everything between here and the return is await-free,
+        # so the event loop runs it atomically.
+
+        # Monotonic: timing cannot run backwards or jump when the wall
+        # clock is stepped (NTP/DST), and reads are cheaper.
+        if now is None:
+            now = _monotonic()
+        period = 1.0 / limit_per_second  # emission interval between requests
+        tau = burst_size * period        # burst tolerance
+
+        bucket = buckets.get(key)
+        if bucket is None:
+            # tat == now means the full burst is available. No LRU entry
+            # here: both branches below record the touch, so appending
+            # on creation too would double the deque traffic per key.
+            bucket = buckets[key] = _Bucket(now)
+
+        bucket.touched = now
+        lru.append((now, key))
+
+        tat = bucket.tat
+        new_tat = (tat if tat > now else now) + period
+        if new_tat - now <= tau:
+            bucket.tat = new_tat
+            if bucket.deny_streak:
+                bucket.deny_streak = 0
+            result = (True, 0.0)
+        else:
+            streak = bucket.deny_streak + 1
+            bucket.deny_streak = streak
+            retry_after = new_tat - tau - now
+            if streak >= self.DENY_STREAK_THRESHOLD:
+                # Persistent offender: push the TAT out one extra period
+                # per denial past the threshold, so the wait grows
+                # quadratically while it keeps hammering. A well-behaved
+                # client that backs off is never penalised. The push-out
+                # is capped so the TAT cannot diverge arbitrarily far
+                # past now, keeping retry times sane.
+                penalty = (streak - self.DENY_STREAK_THRESHOLD + 1) * period
+                penalized = min(new_tat + penalty, now + self.MAX_PENALTY_HORIZON)
+                if penalized > bucket.tat:
+                    bucket.tat = penalized
+                retry_after = bucket.tat - tau - now
+            result = (False, retry_after)
+
+        # Amortized eviction: retire stale entries from the left of the
+        # touch deque. A bucket checked since its entry was recorded has
+        # touched past the entry's timestamp and a fresher entry further
+        # right, so it is skipped here. The sweep is capped per call so a
+        # large backlog of expiries (e.g. after an idle stretch following
+        # a flood) spreads across requests instead of stalling one. When
+        # the table is over its hard cap (a flood of distinct keys, e.g.
+        # spoofed source IPs, arriving faster than they age out), the
+        # age cutoff is waived so the oldest-touched buckets go first.
+        cutoff = now - self.BUCKET_MAX_AGE
+        budget = self.MAX_EVICTIONS_PER_CHECK
+        max_buckets = self.MAX_BUCKETS
+        while budget and lru and (lru[0][0] < cutoff or len(buckets) > max_buckets):
+            touched_at, stale_key = lru.popleft()
+            if stale_key == key:
+                # Never evict the bucket being checked: once a saturated
+                # table has drained its other entries, the over-cap sweep
+                # would otherwise pop this key's sole entry and reset its
+                # state every call, handing a flooding IP a fresh burst
+                # per request.
+                budget -= 1
+                continue
+            stale = buckets.get(stale_key)
+            if stale is not None and stale.touched <= touched_at:
+                del buckets[stale_key]
+            budget -= 1
+
+        return result
+
+    # Sync checks. The limiter is in-process and never does I/O, so a
+    # check is a plain call: no coroutine object, no event-loop
+    # round-trip per request. Preferred on hot paths.
+
+    def try_check_global_limit(self, ip: str) -> tuple[bool, float]:
+        """Check global rate limit for an IP."""
+        config = self._config
+        return self._allow(
+            self._global_buckets,
+            self._global_lru,
+            _ip_key(ip),
+            config.global_rate,
+            config.global_burst,
+        )
+
+    def try_check_pairing_limit(self, ip: str) -> tuple[bool, float]:
+        """Check pairing rate limit for an IP."""
+        config = self._config
+        return self._allow(
+            self._pairing_buckets,
+            self._pairing_lru,
+            _ip_key(ip),
+            config.pairing_rate,
+            config.pairing_burst,
+        )
+
+    def try_check_command_limit(self, session_id: str) -> tuple[bool, float]:
+        """Check command submission rate limit for a session."""
+        config = self._config
+        return self._allow(
+            self._command_buckets,
+            self._command_lru,
+            session_id,
+            config.command_rate,
+            config.command_burst,
+        )
+
+    def try_check_websocket_limit(self, client_id: str) -> tuple[bool, float]:
+        """Check WebSocket message rate limit for a client."""
+        config = self._config
+        return self._allow(
+            self._ws_buckets,
+            self._ws_lru,
+            client_id,
+            config.websocket_rate,
+            config.websocket_burst,
+        )
+
+    def try_check_request(
+        self,
+        ip: str,
+        kind: Optional[str] = None,
+        key: Optional[str] = None,
+    ) -> tuple[bool, float]:
+        """Run the global and an endpoint-specific check in one pass.
+
+        Both checks share a single clock read, and when only the
+        endpoint limit refuses, the global slot just taken is refunded,
+        so a denied pairing attempt does not also burn global budget.
+        Callers that use this must not also run the global check
+        separately (e.g. the path must be exempt in the middleware).
+
+        Args:
+            ip: Client IP for the global (and pairing) bucket.
+            kind: Endpoint class: "pairing", "command" or "websocket";
+                None runs the global check alone.
+            key: Bucket key for "command" (session id) and "websocket"
+                (client id) kinds; ignored for "pairing".
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds).
+        """
+        config = self._config
+        now = _monotonic()
+        ip_key = _ip_key(ip)
+        allowed, retry_after = self._allow(
+            self._global_buckets,
+            self._global_lru,
+            ip_key,
+            config.global_rate,
+            config.global_burst,
+            now,
+        )
+        if not allowed or kind is None:
+            return allowed, retry_after
+
+        if kind == "pairing":
+            args = (
+                self._pairing_buckets, self._pairing_lru, ip_key,
+                config.pairing_rate, config.pairing_burst,
+            )
+        elif kind == "command":
+            args = (
+                self._command_buckets, self._command_lru, key,
+                config.command_rate, config.command_burst,
+            )
+        elif kind == "websocket":
+            args = (
+                self._ws_buckets, self._ws_lru, key,
+                config.websocket_rate, config.websocket_burst,
+            )
+        else:
+            raise ValueError(f"Unknown endpoint kind: {kind}")
+
+        allowed, retry_after = self._allow(*args, now)
+        if not allowed:
+            # Refund: pull the global TAT back the one emission interval
+            # the allow above advanced it. get() rather than indexing in
+            # case the over-cap sweep evicted the bucket meanwhile.
+            bucket = self._global_buckets.get(ip_key)
+            if bucket is not None:
+                bucket.tat -= 1.0 / config.global_rate
+        return allowed, retry_after
+
+    # Awaitable wrappers kept for callers written against the async API.
+
+    async def check_global_limit(self, ip: str) -> tuple[bool, float]:
+        """Async wrapper around try_check_global_limit."""
+        return self.try_check_global_limit(ip)
+
+    async def check_pairing_limit(self, ip: str) -> tuple[bool, float]:
+        """Async wrapper around try_check_pairing_limit."""
+        return self.try_check_pairing_limit(ip)
+
+    async def check_command_limit(self, session_id: str) -> tuple[bool, float]:
+        """Async wrapper around try_check_command_limit."""
+        return self.try_check_command_limit(session_id)
+
+    async def check_websocket_limit(self, client_id: str) -> tuple[bool, float]:
+        """Async wrapper around try_check_websocket_limit."""
+        return self.try_check_websocket_limit(client_id)
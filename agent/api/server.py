@@ -3,10 +3,15 @@
 import asyncio
 import base64
 import collections
+import ipaddress
 import json
 import logging
+import os
 import platform
+import shlex
+import signal
 import socket
+import subprocess
 import time
 from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
@@ -14,9 +19,42 @@ from typing import Any, Callable, Optional
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse
+from starlette.websockets import WebSocketState
 from pydantic import BaseModel, Field
-from starlette.middleware.base import BaseHTTPMiddleware
 
+# orjson serializes 2-5x faster than stdlib json and returns bytes
+# directly (no separate UTF-8 encode). Optional, like uvloop: without
+# it the stdlib path below produces identical payloads.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    class _DefaultResponseClass(JSONResponse):
+        """JSONResponse rendered by orjson.
+
+        Defined locally rather than using fastapi.responses.ORJSONResponse,
+        which is deprecated and logs a warning per response.
+        """
+
+        def render(self, content: Any) -> bytes:
+            return orjson.dumps(content)
+
+    def _json_dumps_bytes(obj: Any) -> bytes:
+        """Serialize to compact UTF-8 JSON bytes."""
+        return orjson.dumps(obj)
+else:
+    _json_loads = json.loads
+    _DefaultResponseClass = JSONResponse
+
+    def _json_dumps_bytes(obj: Any) -> bytes:
+        """Serialize to compact UTF-8 JSON bytes."""
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+from .ratelimit import RateLimitConfig, RateLimiter
 from ..security.pairing import PairingManager
 from ..security.auth import set_pairing_manager, verify_token, verify_websocket_token
 from ..control.screen import FrameStreamer, ScreenCapture, FrameMetrics, get_primary_monitor_info
@@ -38,189 +76,162 @@ from .commands import (
 
 logger = logging.getLogger(__name__)
 
+# Strong references to fire-and-forget tasks. The event loop only holds
+# weak references to tasks, so an otherwise-unreferenced background task
+# can be garbage collected before it runs to completion.
+_bg_tasks: set["asyncio.Task"] = set()
 
-# =============================================================================
-# Rate Limiter
-# =============================================================================
 
-@dataclass
-class RateLimitConfig:
-    """Configuration for rate limiting."""
-    # Global rate limits
-    requests_per_minute: int = 120  # Max requests per minute per IP
-    requests_per_second: int = 10   # Max requests per second per IP
+def _spawn_background(coro) -> "asyncio.Task":
+    """Run a coroutine in the background without awaiting it."""
+    task = asyncio.create_task(coro)
+    _bg_tasks.add(task)
+    task.add_done_callback(_bg_tasks.discard)
+    return task
 
-    # Endpoint-specific limits
-    pairing_per_minute: int = 5     # Max pairing attempts per minute per IP
-    commands_per_second: int = 20   # Max command batches per second per session
-    websocket_messages_per_second: int = 30  # Max WS messages per second
 
-    # Burst allowance
-    burst_multiplier: float = 1.5   # Allow short bursts up to this multiplier
+# =============================================================================
+# Rate Limiter
+# =============================================================================
 
+class RateLimitMiddleware:
+    """Global rate limiting as a bare ASGI middleware.
 
-class RateLimiter:
+    Written against the raw ASGI interface rather than
+    BaseHTTPMiddleware, which wraps every request in an extra task plus
+    a pair of memory-object streams just to present the Request /
+    call_next API — documented per-request overhead. An allowed request
+    here costs a path probe, an IP resolve, and one sync limiter check
+    before the wrapped app runs on the same task.
     """
-    Token bucket rate limiter for API endpoints.
 
-    Implements per-IP and per-endpoint rate limiting with configurable
-    limits and burst allowance.
-    """
+    DENIED_CACHE_SIZE = 1024  # Max "denied until" entries kept per instance
 
-    def __init__(self, config: Optional[RateLimitConfig] = None):
-        """
-        Initialize the rate limiter.
+    # Pre-serialized 429 body; only retry_after varies, so denials skip
+    # dict construction and json.dumps entirely.
+    _DENY_BODY = '{"detail":"Too many requests","retry_after":%.2f}'
 
-        Args:
-            config: Rate limiting configuration.
-        """
-        self._config = config or RateLimitConfig()
-        self._buckets: dict[str, dict[str, Any]] = {}
-        self._lock = asyncio.Lock()
-        self._cleanup_interval = 60.0  # Clean up old buckets every 60 seconds
-        self._last_cleanup = time.time()
+    # Loopback traffic (health probes, the tray UI, sibling processes on
+    # this host) is never throttled; "unknown" is the placeholder for
+    # transports that carry no client address, i.e. in-process test
+    # clients. O(1) frozenset probe before any limiter work.
+    _EXEMPT_IPS = frozenset({"127.0.0.1", "::1", "unknown"})
 
-    async def check_rate_limit(
+    def __init__(
         self,
-        key: str,
-        limit_per_second: float,
-        burst_size: Optional[int] = None,
-    ) -> tuple[bool, float]:
-        """
-        Check if a request is within rate limits.
-
-        Args:
-            key: Unique identifier for the rate limit bucket (e.g., IP address).
-            limit_per_second: Maximum requests per second.
-            burst_size: Maximum burst size (defaults to limit * burst_multiplier).
-
-        Returns:
-            Tuple of (allowed, retry_after_seconds).
-        """
-        if burst_size is None:
-            burst_size = int(limit_per_second * self._config.burst_multiplier)
-
-        async with self._lock:
-            now = time.time()
-
-            # Periodic cleanup
-            if now - self._last_cleanup > self._cleanup_interval:
-                self._cleanup_old_buckets(now)
-                self._last_cleanup = now
-
-            # Get or create bucket
-            if key not in self._buckets:
-                self._buckets[key] = {
-                    "tokens": float(burst_size),
-                    "last_update": now,
-                }
-
-            bucket = self._buckets[key]
-
-            # Refill tokens based on elapsed time
-            elapsed = now - bucket["last_update"]
-            bucket["tokens"] = min(
-                burst_size,
-                bucket["tokens"] + elapsed * limit_per_second,
-            )
-            bucket["last_update"] = now
-
-            # Check if we have a token available
-            if bucket["tokens"] >= 1.0:
-                bucket["tokens"] -= 1.0
-                return (True, 0.0)
-            else:
-                # Calculate retry-after
-                tokens_needed = 1.0 - bucket["tokens"]
-                retry_after = tokens_needed / limit_per_second
-                return (False, retry_after)
-
-    def _cleanup_old_buckets(self, now: float) -> None:
-        """Remove buckets that haven't been used recently."""
-        max_age = 300.0  # 5 minutes
-        to_remove = [
-            key for key, bucket in self._buckets.items()
-            if now - bucket["last_update"] > max_age
-        ]
-        for key in to_remove:
-            del self._buckets[key]
-
-    async def check_global_limit(self, ip: str) -> tuple[bool, float]:
-        """Check global rate limit for an IP."""
-        return await self.check_rate_limit(
-            f"global:{ip}",
-            self._config.requests_per_second,
-        )
-
-    async def check_pairing_limit(self, ip: str) -> tuple[bool, float]:
-        """Check pairing rate limit for an IP."""
-        return await self.check_rate_limit(
-            f"pairing:{ip}",
-            self._config.pairing_per_minute / 60.0,
-            burst_size=2,
-        )
-
-    async def check_command_limit(self, session_id: str) -> tuple[bool, float]:
-        """Check command submission rate limit for a session."""
-        return await self.check_rate_limit(
-            f"commands:{session_id}",
-            self._config.commands_per_second,
-        )
-
-    async def check_websocket_limit(self, client_id: str) -> tuple[bool, float]:
-        """Check WebSocket message rate limit for a client."""
-        return await self.check_rate_limit(
-            f"ws:{client_id}",
-            self._config.websocket_messages_per_second,
-        )
-
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware for applying global rate limiting."""
+        app,
+        rate_limiter: Optional[RateLimiter] = None,
+        audit_logger: Optional[AuditLogger] = None,
+        exempt_paths: frozenset[str] = frozenset({"/health"}),
+        exempt_prefixes: tuple[str, ...] = (),
+    ):
+        self._app = app
+        # Limiter state is event-loop-local by construction: each app (and
+        # thus each worker's loop) gets its own middleware instance, so an
+        # instance-owned limiter is never contended across loops.
+        self._rate_limiter = rate_limiter or RateLimiter()
+        self._audit_logger = audit_logger or get_audit_logger()
+        self._exempt_paths = exempt_paths
+        self._exempt_prefixes = exempt_prefixes
+        # ip -> monotonic deadline before which requests are denied without
+        # touching the limiter. Turns a flood from a blocked IP into a
+        # dict probe + canned 429 instead of refill math plus audit I/O.
+        self._denied: collections.OrderedDict[str, float] = collections.OrderedDict()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
 
-    def __init__(self, app, rate_limiter: RateLimiter, audit_logger: AuditLogger):
-        super().__init__(app)
-        self._rate_limiter = rate_limiter
-        self._audit_logger = audit_logger
+        # Skip rate limiting for exempt paths (health checks, etc.)
+        path = scope["path"]
+        if path in self._exempt_paths or (
+            self._exempt_prefixes and path.startswith(self._exempt_prefixes)
+        ):
+            await self._app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         # Get client IP
-        client_ip = self._get_client_ip(request)
+        client_ip = self._resolve_client_ip(scope)
+        if client_ip in self._EXEMPT_IPS:
+            await self._app(scope, receive, send)
+            return
 
-        # Skip rate limiting for health check
-        if request.url.path == "/health":
-            return await call_next(request)
+        # Fast path for IPs already known to be blocked
+        denied_until = self._denied.get(client_ip)
+        if denied_until is not None:
+            remaining = denied_until - time.monotonic()
+            if remaining > 0:
+                await self._send_deny(send, remaining)
+                return
+            del self._denied[client_ip]
 
         # Check global rate limit
-        allowed, retry_after = await self._rate_limiter.check_global_limit(client_ip)
+        # Sync check: the in-process limiter never does I/O, so there is
+        # no reason to pay coroutine scheduling per request
+        allowed, retry_after = self._rate_limiter.try_check_global_limit(client_ip)
 
         if not allowed:
-            # Log rate limiting event
-            self._audit_logger.log_rate_limited(
+            self._denied[client_ip] = time.monotonic() + retry_after
+            self._denied.move_to_end(client_ip)
+            if len(self._denied) > self.DENIED_CACHE_SIZE:
+                self._denied.popitem(last=False)
+
+            # Log rate limiting event off the response path: the audit
+            # logger writes to a rotating file, and the denial must not
+            # wait on (or rotate with) that I/O.
+            _spawn_background(asyncio.to_thread(
+                self._audit_logger.log_rate_limited,
                 client_id=None,
                 ip_address=client_ip,
-                endpoint=request.url.path,
+                endpoint=path,
                 limit_type="global",
-            )
+            ))
 
-            return JSONResponse(
-                status_code=429,
-                content={
-                    "detail": "Too many requests",
-                    "retry_after": round(retry_after, 2),
-                },
-                headers={"Retry-After": str(int(retry_after) + 1)},
-            )
+            await self._send_deny(send, retry_after)
+            return
+
+        await self._app(scope, receive, send)
+
+    async def _send_deny(self, send, retry_after: float) -> None:
+        """Send a canned 429 without building a Response object."""
+        body = (self._DENY_BODY % retry_after).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(int(retry_after) + 1).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
 
-        return await call_next(request)
+    def _resolve_client_ip(self, scope) -> str:
+        """Resolve the client IP from a scope, memoized in scope state.
 
-    def _get_client_ip(self, request: Request) -> str:
-        """Get the client IP address from the request."""
-        # Check for forwarded header (if behind a proxy)
-        forwarded = request.headers.get("X-Forwarded-For")
-        if forwarded:
-            return forwarded.split(",")[0].strip()
-        return request.client.host if request.client else "unknown"
+        Mirrors _get_client_ip but works on the raw scope; the result
+        lands in scope["state"], so handlers calling _get_client_ip on
+        the built Request get an attribute load, not a reparse.
+        """
+        state = scope.setdefault("state", {})
+        ip = state.get("client_ip")
+        if ip is not None:
+            return ip
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if peer in _TRUSTED_PROXIES:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    candidate = value.decode("latin-1").partition(",")[0].strip()
+                    try:
+                        ipaddress.ip_address(candidate)
+                    except ValueError:
+                        break
+                    state["client_ip"] = candidate
+                    return candidate
+        state["client_ip"] = peer
+        return peer
 
 
 # =============================================================================
@@ -267,22 +278,6 @@ class SubmitCommandsBody(BaseModel):
     commands: list[dict[str, Any]] = Field(default_factory=list)
 
 
-class HealthResponse(BaseModel):
-    """Response for health check."""
-    status: str
-    version: str
-    hostname: str
-    platform: str
-    uptime: float
-
-
-class ScreenInfoResponse(BaseModel):
-    """Response for screen info."""
-    width: int
-    height: int
-    dpi: int
-
-
 class SessionResponse(BaseModel):
     """Response for session operations."""
     session_id: str
@@ -304,15 +299,6 @@ class CommandsResponse(BaseModel):
     queued: list[str]
 
 
-class CommandStatusResponse(BaseModel):
-    """Response for command status."""
-    id: str
-    type: str
-    status: str
-    result: Optional[dict[str, Any]] = None
-    error: Optional[str] = None
-
-
 class ChatMessageBody(BaseModel):
     """Request body for sending a chat message."""
     from_agent: str  # Sender agent name (e.g., "xiaoxia")
@@ -320,15 +306,6 @@ class ChatMessageBody(BaseModel):
     auth_token: Optional[str] = None  # Optional auth token for security
 
 
-class ChatMessage(BaseModel):
-    """A chat message."""
-    timestamp: str
-    from_agent: str
-    to_agent: str
-    message: str
-    direction: str  # "incoming" or "outgoing"
-
-
 class ChatResponse(BaseModel):
     """Response for chat operations."""
     success: bool
@@ -336,12 +313,6 @@ class ChatResponse(BaseModel):
     error: Optional[str] = None
 
 
-class ChatHistoryResponse(BaseModel):
-    """Response for chat history."""
-    messages: list[ChatMessage]
-    count: int
-
-
 @dataclass
 class FrameStreamConfig:
     """Configuration for frame streaming."""
@@ -356,6 +327,27 @@ class FrameStreamConfig:
     monitor_index: int = 0
 
 
+# Host identity for /health, computed once at import: gethostname() is a
+# syscall and platform.system() re-parses uname() on every call, which
+# adds up under 1Hz+ liveness probes. Neither changes while we run.
+_HOSTNAME: str = socket.gethostname()
+_PLATFORM: str = platform.system()
+_VERSION: str = "1.0.0"
+
+
+def _compute_agent_name(hostname: str = _HOSTNAME) -> str:
+    """Map this host to its chat agent name. Fixed for the process
+    lifetime, so the result is computed once at import."""
+    name = hostname.lower()
+    if "xiaolei" in name or "desktop-vn0amd7" in name:
+        return "xiaolei"
+    if "xiaoxia" in name or "lily-virtualbox" in name:
+        return "xiaoxia"
+    return name
+
+
+_MY_AGENT_NAME: str = _compute_agent_name()
+
 # Global state
 _start_time: float = 0
 _pairing_manager: Optional[PairingManager] = None
@@ -363,111 +355,569 @@ _session_manager: Optional[SessionManager] = None
 _command_queue: Optional[CommandQueue] = None
 _frame_streamer: Optional[FrameStreamer] = None
 _frame_config: Optional[FrameStreamConfig] = None
-_connected_websockets: set[WebSocket] = set()
-_streaming_clients: set[WebSocket] = set()  # Clients that want frame streaming
+# Registries keyed by id(ws): broadcasts iterate a snapshot of .values()
+# while disconnect handlers mutate the dict, so a client dropping out
+# mid-fanout can never invalidate an in-flight iteration. Entries carry
+# the bound send_bytes alongside the socket so the innermost fanout loop
+# calls a pre-bound method instead of re-resolving the attribute per
+# send per client.
+_WSEntry = tuple[WebSocket, Callable[[bytes], Any]]
+_connected_websockets: dict[int, _WSEntry] = {}
+_streaming_clients: dict[int, _WSEntry] = {}  # Clients that want frame streaming
 _rate_limiter: Optional[RateLimiter] = None
 _rate_limit_config: Optional[RateLimitConfig] = None
 _kill_switch_state: KillSwitchState = KillSwitchState()
 _audit_logger: Optional[AuditLogger] = None
+# (queried_at, payload) cache for /screen/info; geometry rarely changes
+_SCREEN_INFO_TTL = 60.0
+_screen_info_cache: Optional[tuple[float, dict]] = None
 _on_session_change_callback: Optional[Callable[[int, Optional[str]], None]] = None
 
 
+# Peers whose X-Forwarded-For header is honored. Only a reverse proxy
+# on this host can legitimately set it; from any other peer the header
+# is attacker-controlled and is ignored.
+_TRUSTED_PROXIES = frozenset({"127.0.0.1", "::1"})
+
+
 def _get_client_ip(request: Request) -> str:
-    """Get the client IP address from a request."""
-    forwarded = request.headers.get("X-Forwarded-For")
+    """Get the client IP address from a request.
+
+    The result is invariant for the lifetime of a request, so it is
+    memoized on request.state: the middleware resolves it once and any
+    later call from the same handler is an attribute load instead of a
+    header parse.
+    """
+    ip = getattr(request.state, "client_ip", None)
+    if ip is not None:
+        return ip
+    peer = request.client.host if request.client else "unknown"
+    forwarded = (
+        request.headers.get("X-Forwarded-For")
+        if peer in _TRUSTED_PROXIES
+        else None
+    )
     if forwarded:
-        return forwarded.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+        # Only the first hop matters; partition stops at the first comma
+        # instead of splitting every hop in the header. Fall back to the
+        # socket address when the value is not a valid IP, so a forged
+        # header cannot mint unbounded distinct rate-limit keys.
+        candidate = forwarded.partition(",")[0].strip()
+        try:
+            ipaddress.ip_address(candidate)
+        except ValueError:
+            pass
+        else:
+            request.state.client_ip = candidate
+            return candidate
+    request.state.client_ip = peer
+    return peer
 
 
-async def broadcast_event(event_type: str, event_data: dict[str, Any]) -> None:
-    """Broadcast an event to all connected WebSocket clients."""
-    message = json.dumps({"type": event_type, **event_data})
-    disconnected = []
+# Concurrent sends per gather batch: bounds task creation while keeping
+# fanout latency at max-of-clients instead of sum-of-clients.
+BROADCAST_BATCH_SIZE = 50
+
+# Seconds of client silence before a keepalive message is sent
+WS_KEEPALIVE_INTERVAL = 30.0
 
-    for ws in _connected_websockets:
+# Static reply payloads, built once at import: identical on every send,
+# so there is nothing to serialize per message
+_KEEPALIVE_MSG = '{"type": "keepalive"}'
+_PONG_MSG = "pong"
+_STREAMING_STOPPED_MSG = '{"type":"streaming_stopped"}'
+
+
+async def _ws_keepalive(websocket: WebSocket, last_activity: list[float]) -> None:
+    """Send periodic keepalives while a connection is idle.
+
+    One long-lived task per connection replaces the old per-receive
+    asyncio.wait_for(..., 30.0), which allocated and cancelled a timer
+    handle for every message. last_activity is a single-element list
+    the receive loop stamps with time.monotonic() on each message.
+
+    A keepalive is only sent when the connection is idle in BOTH
+    directions: any recent or pending outbound traffic (tracked by the
+    connection's batcher) already proves liveness to the client.
+    """
+    try:
+        while True:
+            await asyncio.sleep(WS_KEEPALIVE_INTERVAL)
+            now = time.monotonic()
+            if now - last_activity[0] < WS_KEEPALIVE_INTERVAL:
+                continue
+            out = _ws_outbound.get(id(websocket))
+            if out is not None and (
+                out.pending or now - out.last_send < WS_KEEPALIVE_INTERVAL
+            ):
+                continue
+            await _ws_reply(websocket, _KEEPALIVE_MSG)
+    except Exception:
+        # Send failed or the task was cancelled: the receive loop (or
+        # its finally block) owns connection teardown.
+        return
+
+
+class _OutboundBatcher:
+    """Coalesce small outbound text messages for one connection.
+
+    Every control reply and keepalive used to be its own send_text -
+    one WS frame, one TLS record, one syscall per tiny JSON document.
+    Replies are queued here instead, and a single writer task drains
+    whatever has accumulated into one newline-delimited send, so a
+    burst (reply + keepalive + status) costs one frame. Clients split
+    incoming text messages on '\\n'; each line is a complete document.
+
+    Binary frames and their meta headers bypass the batcher: their
+    relative ordering matters and they never come in reply bursts.
+    """
+
+    MAX_QUEUE = 256  # Drop-oldest bound so a stalled socket can't hoard memory
+
+    __slots__ = ("_websocket", "_queue", "_wakeup", "_task", "last_send")
+
+    def __init__(self, websocket: WebSocket):
+        self._websocket = websocket
+        self._queue: collections.deque[str] = collections.deque()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._drain_loop())
+        # Monotonic time of the last completed send; the keepalive task
+        # reads it to stay silent on connections with outbound traffic.
+        self.last_send = time.monotonic()
+
+    @property
+    def pending(self) -> bool:
+        """Whether messages are queued but not yet sent."""
+        return bool(self._queue)
+
+    def send(self, message: str) -> None:
+        """Queue a complete JSON document (or "pong") for sending."""
+        queue = self._queue
+        if len(queue) >= self.MAX_QUEUE:
+            queue.popleft()
+        queue.append(message)
+        self._wakeup.set()
+
+    async def _drain_loop(self) -> None:
+        queue = self._queue
+        wakeup = self._wakeup
         try:
-            await ws.send_text(message)
+            while True:
+                await wakeup.wait()
+                wakeup.clear()
+                if not queue:
+                    continue
+                if len(queue) == 1:
+                    message = queue.popleft()
+                else:
+                    message = "\n".join(queue)
+                    queue.clear()
+                await self._websocket.send_text(message)
+                self.last_send = time.monotonic()
         except Exception:
-            disconnected.append(ws)
+            # Send failed or cancelled; the receive loop owns teardown.
+            return
 
-    for ws in disconnected:
-        _connected_websockets.discard(ws)
-        _streaming_clients.discard(ws)
+    def close(self) -> None:
+        """Stop the writer task; pending messages are discarded."""
+        self._task.cancel()
 
 
-async def broadcast_frame(b64_data: str, metrics: FrameMetrics) -> None:
-    """Broadcast a frame to all streaming clients."""
-    if not _streaming_clients:
-        return
+# Batcher per connection, keyed like the other registries
+_ws_outbound: dict[int, _OutboundBatcher] = {}
 
-    message = json.dumps({
-        "type": "frame",
-        "data": b64_data,
-        "timestamp": metrics.timestamp,
-        "quality": metrics.quality,
-        "size_bytes": metrics.frame_size_bytes,
-    })
 
-    disconnected = []
-    for ws in _streaming_clients:
+async def _ws_reply(websocket: WebSocket, message: str) -> None:
+    """Queue a text reply through the connection's batcher.
+
+    Falls back to a direct send for sockets without a batcher (none in
+    practice once the connection is registered).
+    """
+    out = _ws_outbound.get(id(websocket))
+    if out is not None:
+        out.send(message)
+    else:
+        await websocket.send_text(message)
+
+
+class _FrameWriter:
+    """Per-client frame writer decoupling capture from slow sockets.
+
+    broadcast_frame offers each (meta, jpeg) pair to every writer
+    without awaiting any of them; a dedicated task per client drains
+    its queue onto the socket. The queue holds at most two frames, so
+    a client whose TCP window cannot keep up loses frames - not the
+    connection, and not the server's memory - while fast clients keep
+    receiving at full rate. The capture loop never waits on the
+    slowest peer.
+    """
+
+    MAX_BUFFERED_FRAMES = 2
+
+    __slots__ = ("_websocket", "_queue", "_task", "dropped")
+
+    def __init__(self, websocket: WebSocket):
+        self._websocket = websocket
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=self.MAX_BUFFERED_FRAMES)
+        self._task = asyncio.create_task(self._drain_loop())
+        self.dropped = 0  # Frames skipped because the client was behind
+
+    def offer(self, meta: bytes, jpeg: bytes) -> None:
+        """Queue a frame for this client, dropping it if it is behind."""
         try:
-            await ws.send_text(message)
+            self._queue.put_nowait((meta, jpeg))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _drain_loop(self) -> None:
+        websocket = self._websocket
+        queue = self._queue
+        try:
+            while True:
+                meta, jpeg = await queue.get()
+                await websocket.send_bytes(meta)
+                await websocket.send_bytes(jpeg)
         except Exception:
-            disconnected.append(ws)
+            # Send failed: stop streaming to this client. The events
+            # connection's own teardown handles everything else.
+            ws_id = id(websocket)
+            _streaming_clients.pop(ws_id, None)
+            _frame_writers.pop(ws_id, None)
+            return
+
+    def close(self) -> None:
+        """Stop the writer task; buffered frames are discarded."""
+        self._task.cancel()
+
+
+# Frame writer per streaming client, keyed like the other registries
+_frame_writers: dict[int, _FrameWriter] = {}
+
+
+def _drop_frame_writer(ws_id: int) -> None:
+    """Remove and cancel the frame writer for a connection, if any."""
+    writer = _frame_writers.pop(ws_id, None)
+    if writer is not None:
+        writer.close()
+
+
+# === WebSocket action handlers ===
+# One small coroutine per action, dispatched through _WS_ACTIONS below:
+# a single dict lookup replaces the old elif chain, and each handler
+# shows up individually in profiles.
+
+# Fixed-shape replies carry only numeric values, so they are built
+# with f-strings: no dict construction or json.dumps per reply.
+
+async def _ws_start_streaming(websocket: WebSocket, cmd: dict) -> None:
+    ws_id = id(websocket)
+    _streaming_clients[ws_id] = (websocket, websocket.send_bytes)
+    if ws_id not in _frame_writers:
+        _frame_writers[ws_id] = _FrameWriter(websocket)
+    # Start streamer if not already running
+    if _frame_streamer and _streaming_clients:
+        await _frame_streamer.start()
+    fps = _frame_streamer.target_fps if _frame_streamer else 0
+    quality = _frame_streamer.get_quality() if _frame_streamer else 0
+    await _ws_reply(
+        websocket, f'{{"type":"streaming_started","fps":{fps},"quality":{quality}}}'
+    )
+
+
+async def _ws_stop_streaming(websocket: WebSocket, cmd: dict) -> None:
+    _streaming_clients.pop(id(websocket), None)
+    _drop_frame_writer(id(websocket))
+    # Stop streamer if no more clients
+    if _frame_streamer and not _streaming_clients:
+        await _frame_streamer.stop()
+    await _ws_reply(websocket, _STREAMING_STOPPED_MSG)
+
+
+async def _ws_set_fps(websocket: WebSocket, cmd: dict) -> None:
+    fps = cmd.get("fps", 5)
+    if _frame_streamer:
+        _frame_streamer.target_fps = float(fps)
+        await _ws_reply(
+            websocket, f'{{"type":"fps_updated","fps":{_frame_streamer.target_fps}}}'
+        )
+
+
+async def _ws_set_quality(websocket: WebSocket, cmd: dict) -> None:
+    quality = cmd.get("quality", 70)
+    if _frame_streamer:
+        _frame_streamer.set_quality(int(quality))
+        await _ws_reply(
+            websocket,
+            f'{{"type":"quality_updated","quality":{_frame_streamer.get_quality()}}}'
+        )
+
 
-    for ws in disconnected:
-        _streaming_clients.discard(ws)
-        _connected_websockets.discard(ws)
+async def _ws_capture_frame(websocket: WebSocket, cmd: dict) -> None:
+    # Capture and send a single frame immediately: JSON header, then
+    # the raw JPEG as binary
+    if _frame_streamer:
+        jpeg_data, metrics = await _frame_streamer.capture_single_frame()
+        await websocket.send_text(
+            f'{{"type":"frame_meta","timestamp":{metrics.timestamp},'
+            f'"quality":{metrics.quality},"size_bytes":{metrics.frame_size_bytes}}}'
+        )
+        await websocket.send_bytes(jpeg_data)
+
+
+async def _ws_get_status(websocket: WebSocket, cmd: dict) -> None:
+    # Fixed-shape payload: only the values vary between polls, so the
+    # skeleton is an f-string literal instead of a 7-key dict handed to
+    # the JSON encoder on every poll.
+    streamer = _frame_streamer
+    await _ws_reply(
+        websocket,
+        '{"type":"status"'
+        f',"streaming":{"true" if id(websocket) in _streaming_clients else "false"}'
+        f',"fps":{streamer.target_fps if streamer else 0}'
+        f',"quality":{streamer.get_quality() if streamer else 0}'
+        f',"streaming_active":{"true" if streamer and streamer._running else "false"}'
+        f',"connected_clients":{len(_connected_websockets)}'
+        f',"streaming_clients":{len(_streaming_clients)}}}',
+    )
+
+
+_WS_ACTIONS: dict[Optional[str], Callable] = {
+    "start_streaming": _ws_start_streaming,
+    "stop_streaming": _ws_stop_streaming,
+    "set_fps": _ws_set_fps,
+    "set_quality": _ws_set_quality,
+    "capture_frame": _ws_capture_frame,
+    "get_status": _ws_get_status,
+}
 
 
-def _run_blocking_subprocess(command: str, shell: bool, timeout: int, cwd: Optional[str]):
+async def _fanout(payload: bytes, clients: list[_WSEntry]) -> list[_WSEntry]:
+    """Send a payload to clients concurrently in bounded batches.
+
+    Returns the entries whose send failed, so the caller can drop them
+    from the registries. One slow client no longer stalls the rest of
+    the broadcast tick.
     """
-    Synchronous subprocess execution - runs in thread pool to avoid blocking event loop.
-    
-    This function is intentionally synchronous and will be called via run_in_executor.
-    Moved outside create_app() for testability.
+    disconnected = []
+    for i in range(0, len(clients), BROADCAST_BATCH_SIZE):
+        batch = []
+        for entry in clients[i:i + BROADCAST_BATCH_SIZE]:
+            # Skip sockets already past CONNECTED up front: an attribute
+            # compare is far cheaper than letting the send raise inside
+            # the gather just to classify the socket as dead.
+            if entry[0].application_state is WebSocketState.CONNECTED:
+                batch.append(entry)
+            else:
+                disconnected.append(entry)
+        results = await asyncio.gather(
+            *(send(payload) for _, send in batch),
+            return_exceptions=True,
+        )
+        for entry, result in zip(batch, results):
+            if isinstance(result, BaseException):
+                disconnected.append(entry)
+        if i + BROADCAST_BATCH_SIZE < len(clients):
+            # Yield between batches so a big fanout doesn't monopolize
+            # the loop.
+            await asyncio.sleep(0)
+    return disconnected
+
+
+async def broadcast_event(event_type: str, event_data: dict[str, Any]) -> None:
+    """Broadcast an event to all connected WebSocket clients."""
+    if not _connected_websockets:
+        return
+
+    # Serialize and UTF-8 encode once; every client gets the same bytes
+    # buffer instead of send_text re-encoding the string per client.
+    payload = _json_dumps_bytes({"type": event_type, **event_data})
+
+    for ws, _ in await _fanout(payload, list(_connected_websockets.values())):
+        _connected_websockets.pop(id(ws), None)
+        _streaming_clients.pop(id(ws), None)
+        _drop_frame_writer(id(ws))
+
+
+# Constant chunks of the frame_meta envelope; only the three numeric
+# fields vary per tick. The bytearray is reused across ticks (cleared,
+# never reallocated) - safe because broadcast_frame builds it without
+# awaiting, so ticks cannot interleave mid-build.
+_FRAME_META_PREFIX = b'{"type":"frame_meta","frame_id":'
+_FRAME_META_TIMESTAMP = b',"timestamp":'
+_FRAME_META_QUALITY = b',"quality":'
+_FRAME_META_SIZE = b',"size_bytes":'
+_frame_meta_buf = bytearray()
+# Monotonically increasing id included in each header so clients can
+# pair a meta message with the binary frame that follows it even if a
+# frame is dropped mid-stream.
+_frame_id = 0
+
+
+async def broadcast_frame(jpeg_data: bytes, metrics: FrameMetrics) -> None:
+    """Broadcast a frame to all streaming clients.
+
+    Frames go out as two messages: a small "frame_meta" JSON header
+    followed by the raw JPEG bytes in a binary frame. Skipping base64
+    saves the 33% size inflation and an O(frame) encode per tick;
+    clients tell the messages apart by the leading byte ('{' vs the
+    JPEG 0xFF marker).
+
+    Delivery is hand-off, not send: each client's _FrameWriter gets a
+    non-blocking offer and its own task does the socket I/O, so one
+    slow peer delays nobody and a stalled one just drops frames.
+    """
+    if not _frame_writers:
+        return
+
+    global _frame_id
+    _frame_id += 1
+
+    # Assemble the header from constant chunks in a reused buffer
+    # instead of a fresh dict + json.dumps per tick
+    buf = _frame_meta_buf
+    buf.clear()
+    buf += _FRAME_META_PREFIX
+    buf += str(_frame_id).encode()
+    buf += _FRAME_META_TIMESTAMP
+    buf += str(metrics.timestamp).encode()
+    buf += _FRAME_META_QUALITY
+    buf += str(metrics.quality).encode()
+    buf += _FRAME_META_SIZE
+    buf += str(metrics.frame_size_bytes).encode()
+    buf += b"}"
+    meta = bytes(buf)
+
+    for writer in list(_frame_writers.values()):
+        writer.offer(meta, jpeg_data)
+
+
+# Output caps for /execute: anything past these is never even read from
+# the pipe, bounding both memory and the CPU the child burns producing it
+_EXEC_STDOUT_LIMIT = 50000
+_EXEC_STDERR_LIMIT = 10000
+
+
+async def _read_limited(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Read at most limit+1 bytes from a pipe (the +1 detects truncation)."""
+    chunks = []
+    remaining = limit + 1
+    while remaining > 0:
+        chunk = await stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def _kill_subprocess(proc: "asyncio.subprocess.Process") -> None:
+    """Kill a child and, on POSIX, its whole process group.
+
+    The shell form can leave the real writer as a grandchild of the
+    shell; killing only the shell would leave that writer holding the
+    pipes open and the reads above would never see EOF.
     """
-    import subprocess
-    import time as time_module
-    
-    start = time_module.time()
     try:
-        result = subprocess.run(
-            command,
-            shell=shell,
-            capture_output=True,
-            encoding='utf-8',
-            errors='ignore',  # Handle encoding errors gracefully
-            timeout=timeout,
-            cwd=cwd,
-        )
-        duration = (time_module.time() - start) * 1000
-        
-        return {
-            'success': result.returncode == 0,
-            'exit_code': result.returncode,
-            'stdout': result.stdout[:50000] if result.stdout else '',
-            'stderr': result.stderr[:10000] if result.stderr else '',
-            'duration_ms': duration,
-        }
-    except subprocess.TimeoutExpired:
-        duration = (time_module.time() - start) * 1000
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+
+async def _run_subprocess(command: str, shell: bool, timeout: int, cwd: Optional[str]) -> dict:
+    """
+    Run a shell command via the event loop's subprocess support.
+
+    asyncio.create_subprocess_* keeps the loop free while the command
+    runs — no thread-pool slot is pinned for up to the full timeout.
+    Output is read only up to the caps above, so a logspam command
+    cannot balloon the handler's memory; once a cap is hit the process
+    is killed rather than drained. Moved outside create_app() for
+    testability.
+    """
+    start = time.perf_counter()
+    try:
+        # start_new_session puts the child in its own process group so a
+        # kill can take out shell grandchildren too (POSIX only)
+        new_session = os.name == "posix"
+        if shell:
+            proc = await asyncio.create_subprocess_shell(
+                command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                start_new_session=new_session,
+            )
+        else:
+            proc = await asyncio.create_subprocess_exec(
+                *shlex.split(command),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                start_new_session=new_session,
+            )
+
+        async def read_capped(stream: asyncio.StreamReader, limit: int) -> bytes:
+            data = await _read_limited(stream, limit)
+            if len(data) > limit:
+                # Cap hit while the process is still writing: kill it now
+                # rather than draining output we would discard anyway.
+                # This also makes the other pipe see EOF, so the gather
+                # below completes even if only one stream was spammed.
+                _kill_subprocess(proc)
+            return data
+
+        stdout_task = asyncio.create_task(read_capped(proc.stdout, _EXEC_STDOUT_LIMIT))
+        stderr_task = asyncio.create_task(read_capped(proc.stderr, _EXEC_STDERR_LIMIT))
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                asyncio.gather(stdout_task, stderr_task),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            # Kill first, then let the reads run to EOF: proc.wait() can
+            # hang indefinitely if the pipes are abandoned with data in
+            # flight
+            _kill_subprocess(proc)
+            await asyncio.gather(stdout_task, stderr_task, return_exceptions=True)
+            await proc.wait()
+            return {
+                'success': False,
+                'exit_code': -1,
+                'stdout': '',
+                'stderr': f'Command timed out after {timeout}s',
+                'duration_ms': (time.perf_counter() - start) * 1000,
+            }
+
+        truncated = len(stdout) > _EXEC_STDOUT_LIMIT or len(stderr) > _EXEC_STDERR_LIMIT
+
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            _kill_subprocess(proc)
+            await proc.wait()
+
         return {
-            'success': False,
-            'exit_code': -1,
-            'stdout': '',
-            'stderr': f'Command timed out after {timeout}s',
-            'duration_ms': duration,
+            'success': proc.returncode == 0 and not truncated,
+            'exit_code': proc.returncode,
+            'stdout': stdout[:_EXEC_STDOUT_LIMIT].decode('utf-8', 'ignore') if stdout else '',
+            'stderr': stderr[:_EXEC_STDERR_LIMIT].decode('utf-8', 'ignore') if stderr else '',
+            'duration_ms': (time.perf_counter() - start) * 1000,
+            'truncated': truncated,
         }
     except Exception as e:
-        duration = (time_module.time() - start) * 1000
         return {
             'success': False,
             'exit_code': -1,
             'stdout': '',
             'stderr': str(e),
-            'duration_ms': duration,
+            'duration_ms': (time.perf_counter() - start) * 1000,
         }
 
 
@@ -554,23 +1004,35 @@ def create_app(
         description="Remote PC control agent for AI systems",
         version="1.0.0",
         lifespan=lifespan,
+        # Every endpoint serializes through orjson when it is installed
+        default_response_class=_DefaultResponseClass,
     )
 
-    # Add rate limiting middleware
-    app.add_middleware(RateLimitMiddleware, rate_limiter=_rate_limiter, audit_logger=_audit_logger)
+    # Add rate limiting middleware. /pair/request is exempt here because
+    # its handler runs the combined global+pairing check itself; a
+    # middleware pass on top would charge the global bucket twice.
+    app.add_middleware(
+        RateLimitMiddleware,
+        rate_limiter=_rate_limiter,
+        audit_logger=_audit_logger,
+        exempt_paths=frozenset({"/health", "/pair/request"}),
+    )
 
     # === Health endpoints (no auth required) ===
 
-    @app.get("/health", response_model=HealthResponse)
+    @app.get("/health")
     async def health_check():
         """Health check endpoint - no authentication required."""
-        return HealthResponse(
-            status="healthy",
-            version="1.0.0",
-            hostname=socket.gethostname(),
-            platform=platform.system(),
-            uptime=time.time() - _start_time,
-        )
+        # Poll-heavy path: a plain dict skips Pydantic validation and
+        # goes straight to the (orjson-backed) response class.
+        # Everything but uptime is constant.
+        return {
+            "status": "healthy",
+            "version": _VERSION,
+            "hostname": _HOSTNAME,
+            "platform": _PLATFORM,
+            "uptime": time.time() - _start_time,
+        }
 
     # === Chat endpoints (for agent-to-agent communication) ===
     
@@ -579,36 +1041,88 @@ def create_app(
     from pathlib import Path
     from datetime import datetime
     
+    # Resolved once per app: the location cannot change while we run,
+    # and this hoists the mkdir out of every history read and write.
+    if platform.system() == "Windows":
+        _chat_base = Path(os.environ.get("USERPROFILE", "")) / ".lily-remote"
+    else:
+        _chat_base = Path.home() / ".lily-remote"
+    _chat_base.mkdir(parents=True, exist_ok=True)
+    _chat_file = _chat_base / "chat_history.jsonl"
+
     def _get_chat_file() -> Path:
-        """Get the path to the chat history file."""
-        if platform.system() == "Windows":
-            base = Path(os.environ.get("USERPROFILE", "")) / ".lily-remote"
-        else:
-            base = Path.home() / ".lily-remote"
-        base.mkdir(parents=True, exist_ok=True)
-        return base / "chat_history.json"
-    
+        """Get the path to the chat history file (JSON Lines)."""
+        return _chat_file
+
+    def _dump_chat_lines(history: list) -> bytes:
+        """Serialize messages as JSON Lines, one document per line."""
+        return b"".join(_json_dumps_bytes(m) + b"\n" for m in history)
+
     def _load_chat_history() -> list[dict]:
-        """Load chat history from file."""
+        """Load chat history, migrating the legacy single-JSON file."""
         chat_file = _get_chat_file()
-        if chat_file.exists():
+        if not chat_file.exists():
+            legacy = chat_file.with_suffix(".json")
+            if legacy.exists():
+                try:
+                    history = _json_loads(legacy.read_bytes())
+                except Exception:
+                    return []
+                chat_file.write_bytes(_dump_chat_lines(history))
+                return history
+            return []
+        messages = []
+        for line in chat_file.read_bytes().splitlines():
+            if not line:
+                continue
             try:
-                return json.loads(chat_file.read_text(encoding="utf-8"))
-            except:
-                return []
-        return []
-    
+                messages.append(_json_loads(line))
+            except ValueError:
+                # Torn or corrupt line (e.g. crash mid-append): skip it
+                continue
+        return messages
+
+    # Write-through cache of the history, loaded once per app: readers
+    # serve from memory instead of re-reading and re-parsing the file
+    # on every call, and maxlen enforces the message cap in memory.
+    _chat_cache: collections.deque = collections.deque(
+        _load_chat_history(), maxlen=1000
+    )
+
+    # Appends since the last compaction pass; one-element list so the
+    # nested handler below can mutate it.
+    _chat_appends = [0]
+
     def _save_chat_message(msg: dict):
-        """Append a message to chat history."""
-        history = _load_chat_history()
-        history.append(msg)
-        # Keep last 1000 messages
-        if len(history) > 1000:
-            history = history[-1000:]
-        _get_chat_file().write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding="utf-8")
+        """Append a message to chat history.
+
+        The cache gets the message immediately; on disk, JSONL makes
+        persistence an O(1) append of one line instead of the old
+        load-all/rewrite-all cycle. Every 100 appends a compaction pass
+        trims the file to its last 1000 lines, so the cap costs one
+        rewrite per hundred messages rather than one per message.
+        """
+        _chat_cache.append(msg)
+        chat_file = _get_chat_file()
+        with open(chat_file, "ab") as f:
+            f.write(_json_dumps_bytes(msg) + b"\n")
+        _chat_appends[0] += 1
+        if _chat_appends[0] >= 100:
+            _chat_appends[0] = 0
+            lines = chat_file.read_bytes().splitlines(keepends=True)
+            if len(lines) > 1000:
+                with open(chat_file, "wb") as f:
+                    f.writelines(lines[-1000:])
+
+    # (token, expires_at): probing two paths and reading a file per
+    # /chat/send is needless; a short TTL still picks up token edits.
+    _auth_token_cache: list = [None, 0.0]
 
     def _get_auth_token() -> Optional[str]:
-        """Get the configured auth token for chat."""
+        """Get the configured auth token for chat (cached, 60s TTL)."""
+        now = time.monotonic()
+        if now < _auth_token_cache[1]:
+            return _auth_token_cache[0]
         # Check common locations for auth token
         token_paths = []
         if platform.system() == "Windows":
@@ -622,13 +1136,17 @@ def create_app(
                 Path.home() / ".lily-remote" / "chat-token.txt",
             ]
         
+        token = None
         for path in token_paths:
             if path.exists():
                 try:
-                    return path.read_text(encoding="utf-8").strip()
+                    token = path.read_text(encoding="utf-8").strip()
+                    break
                 except:
                     pass
-        return None
+        _auth_token_cache[0] = token
+        _auth_token_cache[1] = now + 60.0
+        return token
     
     def _verify_chat_token(provided_token: Optional[str]) -> bool:
         """Verify the chat auth token. Returns True if valid or no token configured."""
@@ -640,49 +1158,58 @@ def create_app(
             return False
         return provided_token == stored_token
 
-    def _trigger_local_agent(from_agent: str, message: str):
+    async def _trigger_local_agent(from_agent: str, message: str):
         """Trigger local Clawdbot agent to respond to chat message.
-        
+
         Uses `clawdbot cron wake` CLI command instead of HTTP API,
         because Gateway wake is implemented via WebSocket RPC, not REST.
+        Runs as a background task on the loop, so burst chat traffic
+        spawns tasks rather than one blocked OS thread per wake.
         """
-        import threading
-        import subprocess
-        import shlex
-        
-        def do_trigger():
+        try:
+            # Construct wake message
+            wake_text = f"收到来自 {from_agent} 的聊天消息，请检查 curl -k https://127.0.0.1:8765/chat/history 并回复！"
+
+            # Use clawdbot CLI to trigger wake (works on both Windows and Linux)
+            # clawdbot system event --mode now triggers immediate heartbeat
+            cmd = ["clawdbot", "system", "event", "--text", wake_text, "--mode", "now"]
+
             try:
-                # Construct wake message
-                wake_text = f"收到来自 {from_agent} 的聊天消息，请检查 curl -k https://127.0.0.1:8765/chat/history 并回复！"
-                
-                # Use clawdbot CLI to trigger wake (works on both Windows and Linux)
-                # clawdbot system event --mode now triggers immediate heartbeat
-                cmd = ["clawdbot", "system", "event", "--text", wake_text, "--mode", "now"]
-                
-                try:
-                    result = subprocess.run(
-                        cmd,
-                        capture_output=True,
-                        text=True,
-                        timeout=10,
-                        shell=(platform.system() == "Windows")  # Windows needs shell=True for PATH
+                if platform.system() == "Windows":
+                    # Windows needs the shell for PATH resolution
+                    proc = await asyncio.create_subprocess_shell(
+                        subprocess.list2cmdline(cmd),
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                    )
+                else:
+                    proc = await asyncio.create_subprocess_exec(
+                        *cmd,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
                     )
-                    
-                    if result.returncode == 0:
-                        logger.info(f"Agent triggered successfully via clawdbot cron wake")
-                    else:
-                        logger.warning(f"clawdbot cron wake failed: {result.stderr}")
-                        
-                except subprocess.TimeoutExpired:
+                try:
+                    _, stderr = await asyncio.wait_for(proc.communicate(), timeout=10)
+                except asyncio.TimeoutError:
+                    _kill_subprocess(proc)
+                    # Drain the pipes to EOF so wait() cannot hang on a
+                    # child still holding them open
+                    await proc.communicate()
                     logger.warning("clawdbot cron wake timed out")
-                except FileNotFoundError:
-                    logger.warning("clawdbot CLI not found in PATH")
-                    
-            except Exception as e:
-                logger.warning(f"Failed to trigger agent: {e}")
-        
-        # Run in background thread to not block response
-        threading.Thread(target=do_trigger, daemon=True).start()
+                    return
+
+                if proc.returncode == 0:
+                    logger.info(f"Agent triggered successfully via clawdbot cron wake")
+                else:
+                    logger.warning(
+                        f"clawdbot cron wake failed: {stderr.decode(errors='replace')}"
+                    )
+
+            except FileNotFoundError:
+                logger.warning("clawdbot CLI not found in PATH")
+
+        except Exception as e:
+            logger.warning(f"Failed to trigger agent: {e}")
 
     @app.post("/chat/send", response_model=ChatResponse)
     async def chat_send(body: ChatMessageBody):
@@ -697,12 +1224,8 @@ def create_app(
                 logger.warning(f"Chat rejected: invalid auth token from {body.from_agent}")
                 return ChatResponse(success=False, error="Invalid or missing auth token")
             
-            my_name = socket.gethostname().lower()
-            if "xiaolei" in my_name or "desktop-vn0amd7" in my_name.lower():
-                my_name = "xiaolei"
-            elif "xiaoxia" in my_name or "lily-virtualbox" in my_name.lower():
-                my_name = "xiaoxia"
-            
+            my_name = _MY_AGENT_NAME
+
             msg = {
                 "timestamp": datetime.now().isoformat(),
                 "from_agent": body.from_agent,
@@ -716,8 +1239,8 @@ def create_app(
             msg_id = f"msg_{int(time.time() * 1000)}"
             logger.info(f"Chat received from {body.from_agent}: {body.message[:50]}...")
             
-            # Trigger local agent to respond
-            _trigger_local_agent(body.from_agent, body.message)
+            # Trigger local agent to respond, off the response path
+            _spawn_background(_trigger_local_agent(body.from_agent, body.message))
             
             return ChatResponse(success=True, message_id=msg_id)
         except Exception as e:
@@ -731,12 +1254,8 @@ def create_app(
         Called by sender after successfully sending to recipient.
         """
         try:
-            my_name = socket.gethostname().lower()
-            if "xiaolei" in my_name or "desktop-vn0amd7" in my_name.lower():
-                my_name = "xiaolei"
-            elif "xiaoxia" in my_name or "lily-virtualbox" in my_name.lower():
-                my_name = "xiaoxia"
-            
+            my_name = _MY_AGENT_NAME
+
             # body.from_agent is actually "me" (the sender)
             # body.message contains the message we sent
             # We need to figure out who we sent it to
@@ -759,15 +1278,19 @@ def create_app(
             logger.error(f"Save outgoing error: {e}")
             return ChatResponse(success=False, error=str(e))
 
-    @app.get("/chat/history", response_model=ChatHistoryResponse)
+    @app.get("/chat/history")
     async def chat_history(limit: int = 50):
         """Get recent chat history."""
-        history = _load_chat_history()
+        # Served from the in-memory cache; the file is never touched.
+        # The cached entries are already response-shaped dicts, so
+        # rebuilding pydantic models per poll would only add a
+        # validation pass over data this process wrote itself.
+        history = list(_chat_cache)
         recent = history[-limit:] if len(history) > limit else history
-        return ChatHistoryResponse(
-            messages=[ChatMessage(**m) for m in recent],
-            count=len(recent),
-        )
+        return {
+            "messages": recent,
+            "count": len(recent),
+        }
 
     @app.get("/chat/check")
     async def chat_check():
@@ -776,53 +1299,52 @@ def create_app(
         Returns unread messages and marks them as read.
         This is the lightweight interrupt mechanism for sister chat.
         """
-        history = _load_chat_history()
-        
         # Find unread incoming messages
         # Only messages with explicit read=False are unread
         # Messages without 'read' field are old messages, treat as read
         unread = []
         updated = False
-        for msg in history:
+        for msg in _chat_cache:
             if msg.get("direction") == "incoming" and msg.get("read") is False:
                 unread.append(msg)
                 msg["read"] = True
                 updated = True
-        
-        # Save if we marked any as read
+
+        # Persist the flipped flags off the response path: the cache is
+        # already authoritative, so the rewrite can run in a thread.
         if updated:
-            _save_chat_history(history)
-        
+            _spawn_background(
+                asyncio.to_thread(_save_chat_history, list(_chat_cache))
+            )
+
         return {
             "unread_count": len(unread),
             "messages": unread,
         }
 
     def _save_chat_history(history: list):
-        """Save full chat history back to file."""
-        chat_file = _get_chat_file()
-        chat_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(chat_file, "w", encoding="utf-8") as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
+        """Save full chat history back to file (read-flag updates)."""
+        _get_chat_file().write_bytes(_dump_chat_lines(history))
 
-    @app.get("/screen/info", response_model=ScreenInfoResponse)
+    @app.get("/screen/info")
     async def screen_info():
         """Get screen information - no authentication required."""
+        global _screen_info_cache
+        # Monitor geometry changes rarely but querying it walks the
+        # display stack; serve a cached payload and re-query on a TTL.
+        now = time.monotonic()
+        cached = _screen_info_cache
+        if cached is not None and now - cached[0] < _SCREEN_INFO_TTL:
+            return cached[1]
         try:
             info = get_primary_monitor_info()
-            return ScreenInfoResponse(
-                width=info.width,
-                height=info.height,
-                dpi=info.dpi,
-            )
+            payload = {"width": info.width, "height": info.height, "dpi": info.dpi}
         except Exception as e:
             logger.warning("Failed to get screen info: %s", e)
             # Fallback to common defaults
-            return ScreenInfoResponse(
-                width=1920,
-                height=1080,
-                dpi=96,
-            )
+            payload = {"width": 1920, "height": 1080, "dpi": 96}
+        _screen_info_cache = (now, payload)
+        return payload
 
     @app.get("/screen/capture")
     async def screen_capture(quality: int = 50, scale: float = 0.5):
@@ -863,37 +1385,34 @@ def create_app(
         stdout: str
         stderr: str
         duration_ms: float
+        truncated: bool = False
 
     @app.post("/execute", response_model=ExecuteResponse)
     async def execute_command(body: ExecuteBody):
         """
         Execute a shell command on the target PC.
-        
-        Uses run_in_executor to avoid blocking the event loop.
-        
+
+        Uses asyncio subprocess support so the event loop stays free
+        while the command runs.
+
         Args:
             command: Command to execute
             timeout: Timeout in seconds (default 30)
             shell: Run in shell (default True)
             cwd: Working directory (optional)
-        
+
         Returns:
             Command output and exit code
         """
-        from functools import partial
-        
-        loop = asyncio.get_running_loop()
-        
-        # Run blocking subprocess in thread pool
-        func = partial(_run_blocking_subprocess, body.command, body.shell, body.timeout, body.cwd)
-        result = await loop.run_in_executor(None, func)
-        
+        result = await _run_subprocess(body.command, body.shell, body.timeout, body.cwd)
+
         return ExecuteResponse(
             success=result['success'],
             exit_code=result['exit_code'],
             stdout=result['stdout'],
             stderr=result['stderr'],
             duration_ms=result['duration_ms'],
+            truncated=result.get('truncated', False),
         )
 
     # === Pairing endpoints (no auth required) ===
@@ -907,8 +1426,9 @@ def create_app(
         """
         client_ip = _get_client_ip(request)
 
-        # Check pairing rate limit
-        allowed, retry_after = await _rate_limiter.check_pairing_limit(client_ip)
+        # Combined global + pairing check: one limiter pass, one clock
+        # read. The path is exempt from the middleware's global check.
+        allowed, retry_after = _rate_limiter.try_check_request(client_ip, "pairing")
         if not allowed:
             _audit_logger.log_rate_limited(
                 client_id=body.client_id,
@@ -1011,7 +1531,7 @@ def create_app(
             )
 
             # Notify about session change (for tray indicator)
-            active_count = len(_session_manager.get_active_sessions())
+            active_count = _session_manager.active_count
             if _on_session_change_callback:
                 try:
                     _on_session_change_callback(active_count, client_name)
@@ -1051,7 +1571,7 @@ def create_app(
             )
 
             # Notify about session change (for tray indicator)
-            active_count = len(_session_manager.get_active_sessions())
+            active_count = _session_manager.active_count
             if _on_session_change_callback:
                 try:
                     _on_session_change_callback(active_count, None)
@@ -1088,7 +1608,7 @@ def create_app(
             )
 
         # Check command rate limit
-        allowed, retry_after = await _rate_limiter.check_command_limit(body.session_id)
+        allowed, retry_after = _rate_limiter.try_check_command_limit(body.session_id)
         if not allowed:
             client_ip = _get_client_ip(request)
             _audit_logger.log_rate_limited(
@@ -1120,22 +1640,16 @@ def create_app(
                 session_id=body.session_id,
             )
 
-            # Update session command count and audit log each command
-            client_ip = _get_client_ip(request)
-            for cmd_data in body.commands:
-                cmd_id = cmd_data.get("id", "unknown")
-                cmd_type = cmd_data.get("type", "unknown")
-                _session_manager.increment_command_count(body.session_id)
-
-                # Audit log command submission
-                _audit_logger.log_command_submitted(
-                    client_id=client_id,
-                    session_id=body.session_id,
-                    command_id=cmd_id,
-                    command_type=cmd_type,
-                    params={k: v for k, v in cmd_data.items() if k not in ("id", "type")},
-                    ip_address=client_ip,
-                )
+            # One count update and one audit write for the whole batch:
+            # the per-command cost was dominated by the handler lock and
+            # flush per log record, not the payload.
+            _session_manager.bulk_increment(body.session_id, len(body.commands))
+            _audit_logger.log_command_submitted_bulk(
+                client_id=client_id,
+                session_id=body.session_id,
+                commands=body.commands,
+                ip_address=_get_client_ip(request),
+            )
 
             return CommandsResponse(queued=queued_ids)
         except InvalidCommandError as e:
@@ -1143,21 +1657,24 @@ def create_app(
         except CommandError as e:
             raise HTTPException(status_code=503, detail=str(e))
 
-    @app.get("/commands/{command_id}", response_model=CommandStatusResponse)
+    @app.get("/commands/{command_id}")
     async def get_command_status(
         command_id: str,
         client_id: str = Depends(verify_token),
     ):
         """Get command status."""
+        # Clients poll this endpoint; a plain dict skips Pydantic
+        # validation on every poll.
         try:
             command = _command_queue.get_status(command_id)
-            return CommandStatusResponse(
-                id=command.id,
-                type=command.type.value,
-                status=command.status.value,
-                result=command.result.data if command.result else None,
-                error=command.result.error if command.result else None,
-            )
+            result = command.result
+            return {
+                "id": command.id,
+                "type": command.type.value,
+                "status": command.status.value,
+                "result": result.data if result else None,
+                "error": result.error if result else None,
+            }
         except CommandNotFoundError as e:
             raise HTTPException(status_code=404, detail=str(e))
 
@@ -1174,12 +1691,9 @@ def create_app(
 
         client_ip = _get_client_ip(request)
 
-        # Get current active sessions before termination
-        active_sessions = _session_manager.get_active_sessions()
-        session_count = len(active_sessions)
-
-        # Log session ends for each terminated session
-        for session in active_sessions:
+        # Log session ends for each soon-to-be-terminated session; the
+        # generator walks active sessions without materializing a list
+        for session in _session_manager.iter_active_sessions():
             duration = time.time() - session.started_at
             _audit_logger.log_session_end(
                 client_id=session.client_id,
@@ -1214,11 +1728,13 @@ def create_app(
             except Exception:
                 pass
 
-        # Broadcast kill switch event to all connected WebSockets
-        await broadcast_event("kill_switch", {
+        # Broadcast kill switch event to all connected WebSockets in the
+        # background: sessions are already terminated above, and the
+        # emergency response must not wait on fanout to every client
+        _spawn_background(broadcast_event("kill_switch", {
             "activated": True,
             "sessions_terminated": terminated,
-        })
+        }))
 
         return KillSwitchResponse(
             activated=True,
@@ -1242,11 +1758,12 @@ def create_app(
 
         _kill_switch_state = KillSwitchState(active=False)
 
-        # Broadcast deactivation
-        await broadcast_event("kill_switch", {
+        # Broadcast deactivation in the background; the state flip above
+        # is what unblocks new sessions
+        _spawn_background(broadcast_event("kill_switch", {
             "activated": False,
             "sessions_terminated": 0,
-        })
+        }))
 
         return KillSwitchResponse(
             activated=False,
@@ -1287,109 +1804,54 @@ def create_app(
             return
 
         await websocket.accept()
-        _connected_websockets.add(websocket)
+        _connected_websockets[id(websocket)] = (websocket, websocket.send_bytes)
+        _ws_outbound[id(websocket)] = _OutboundBatcher(websocket)
+
+        # One long-lived keepalive task per connection; the receive loop
+        # below stays timer-free and just stamps last_activity.
+        last_activity = [time.monotonic()]
+        keepalive = asyncio.create_task(_ws_keepalive(websocket, last_activity))
 
         try:
             while True:
-                # Keep connection alive and handle incoming messages
+                # Plain receive: the keepalive task owns the idle timer,
+                # so there is no wait_for timer allocated and cancelled
+                # per message
+                message = await websocket.receive_text()
+                last_activity[0] = time.monotonic()
+
+                # Byte-prefix fast path: "ping" is the most frequent
+                # inbound message and never needs a JSON parse
+                if message[:1] == "p":
+                    await _ws_reply(websocket, _PONG_MSG)
+                    continue
+
+                # Try to parse as JSON command
                 try:
-                    message = await asyncio.wait_for(
-                        websocket.receive_text(),
-                        timeout=30.0,
-                    )
-
-                    # Handle ping/pong for keepalive
-                    if message == "ping":
-                        await websocket.send_text("pong")
-                        continue
-
-                    # Try to parse as JSON command
-                    try:
-                        cmd = json.loads(message)
-                        action = cmd.get("action")
-
-                        if action == "start_streaming":
-                            _streaming_clients.add(websocket)
-                            # Start streamer if not already running
-                            if _frame_streamer and _streaming_clients:
-                                await _frame_streamer.start()
-                            await websocket.send_text(json.dumps({
-                                "type": "streaming_started",
-                                "fps": _frame_streamer.target_fps if _frame_streamer else 0,
-                                "quality": _frame_streamer.get_quality() if _frame_streamer else 0,
-                            }))
-
-                        elif action == "stop_streaming":
-                            _streaming_clients.discard(websocket)
-                            # Stop streamer if no more clients
-                            if _frame_streamer and not _streaming_clients:
-                                await _frame_streamer.stop()
-                            await websocket.send_text(json.dumps({
-                                "type": "streaming_stopped",
-                            }))
-
-                        elif action == "set_fps":
-                            fps = cmd.get("fps", 5)
-                            if _frame_streamer:
-                                _frame_streamer.target_fps = float(fps)
-                                await websocket.send_text(json.dumps({
-                                    "type": "fps_updated",
-                                    "fps": _frame_streamer.target_fps,
-                                }))
-
-                        elif action == "set_quality":
-                            quality = cmd.get("quality", 70)
-                            if _frame_streamer:
-                                _frame_streamer.set_quality(int(quality))
-                                await websocket.send_text(json.dumps({
-                                    "type": "quality_updated",
-                                    "quality": _frame_streamer.get_quality(),
-                                }))
-
-                        elif action == "capture_frame":
-                            # Capture and send a single frame immediately
-                            if _frame_streamer:
-                                b64_data, metrics = await _frame_streamer.capture_single_frame()
-                                await websocket.send_text(json.dumps({
-                                    "type": "frame",
-                                    "data": b64_data,
-                                    "timestamp": metrics.timestamp,
-                                    "quality": metrics.quality,
-                                    "size_bytes": metrics.frame_size_bytes,
-                                }))
-
-                        elif action == "get_status":
-                            await websocket.send_text(json.dumps({
-                                "type": "status",
-                                "streaming": websocket in _streaming_clients,
-                                "fps": _frame_streamer.target_fps if _frame_streamer else 0,
-                                "quality": _frame_streamer.get_quality() if _frame_streamer else 0,
-                                "streaming_active": _frame_streamer._running if _frame_streamer else False,
-                                "connected_clients": len(_connected_websockets),
-                                "streaming_clients": len(_streaming_clients),
-                            }))
-
-                        else:
-                            await websocket.send_text(json.dumps({
-                                "type": "error",
-                                "message": f"Unknown action: {action}",
-                            }))
-
-                    except json.JSONDecodeError:
-                        # Not JSON, ignore non-ping messages
-                        pass
+                    cmd = _json_loads(message)
+                except ValueError:
+                    # Not JSON, ignore non-ping messages
+                    continue
+
+                handler = _WS_ACTIONS.get(cmd.get("action"))
+                if handler is not None:
+                    await handler(websocket, cmd)
+                else:
+                    await _ws_reply(websocket, _json_dumps_bytes({
+                        "type": "error",
+                        "message": f"Unknown action: {cmd.get('action')}",
+                    }).decode())
 
-                except asyncio.TimeoutError:
-                    # Send keepalive
-                    try:
-                        await websocket.send_text(json.dumps({"type": "keepalive"}))
-                    except Exception:
-                        break
         except WebSocketDisconnect:
             pass
         finally:
-            _connected_websockets.discard(websocket)
-            _streaming_clients.discard(websocket)
+            keepalive.cancel()
+            out = _ws_outbound.pop(id(websocket), None)
+            if out is not None:
+                out.close()
+            _connected_websockets.pop(id(websocket), None)
+            _streaming_clients.pop(id(websocket), None)
+            _drop_frame_writer(id(websocket))
             # Stop streamer if no more streaming clients
             if _frame_streamer and not _streaming_clients:
                 await _frame_streamer.stop()
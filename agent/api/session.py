@@ -239,6 +239,52 @@ class SessionManager:
         session.command_count += 1
         return session.command_count
 
+    def bulk_increment(self, session_id: str, n: int) -> int:
+        """
+        Increment the command count for a session by n in one step.
+
+        Args:
+            session_id: The session's unique identifier.
+            n: Number of commands to add to the count.
+
+        Returns:
+            The new command count.
+
+        Raises:
+            SessionNotFoundError: If the session is not found.
+        """
+        session = self._sessions.get(session_id)
+        if not session:
+            raise SessionNotFoundError(f"Session {session_id} not found")
+
+        session.command_count += n
+        return session.command_count
+
+    def iter_active_sessions(self):
+        """
+        Iterate over active sessions, reaping expired ones as they are seen.
+
+        Walks only the client->session mapping (one entry per active
+        client) instead of the full session table, which retains ended
+        sessions as well, and yields without materializing a list.
+
+        Yields:
+            Active Session objects.
+        """
+        for session_id in list(self._client_sessions.values()):
+            session = self._sessions.get(session_id)
+            if not session or not session.is_active():
+                continue
+            if self._is_session_expired(session):
+                self._end_session_internal(session)
+                continue
+            yield session
+
+    @property
+    def active_count(self) -> int:
+        """Number of currently active sessions."""
+        return sum(1 for _ in self.iter_active_sessions())
+
     def get_active_sessions(self) -> list[Session]:
         """
         Get all active sessions.
@@ -246,12 +292,7 @@ class SessionManager:
         Returns:
             List of active Session objects.
         """
-        # Clean up expired sessions
-        for session in list(self._sessions.values()):
-            if session.is_active() and self._is_session_expired(session):
-                self._end_session_internal(session)
-
-        return [s for s in self._sessions.values() if s.is_active()]
+        return list(self.iter_active_sessions())
 
     def _is_session_expired(self, session: Session) -> bool:
         """Check if a session has exceeded the maximum duration."""
@@ -224,6 +224,56 @@ class AuditLogger:
         )
         self.log(event)
 
+    def log_command_submitted_bulk(
+        self,
+        client_id: str,
+        session_id: str,
+        commands: list[dict[str, Any]],
+        ip_address: Optional[str] = None,
+    ) -> None:
+        """
+        Log a batch of command submissions with a single write.
+
+        Emits one log record containing one JSON line per command, so
+        the handler lock is acquired and the file flushed once per
+        batch instead of once per command. The output is line-for-line
+        identical to N log_command_submitted calls.
+
+        Args:
+            commands: Raw command dicts as submitted; "id" and "type"
+                are taken from each, the rest are logged as params.
+        """
+        if not commands:
+            return
+        self._ensure_initialized()
+
+        now = time.time()
+        lines = []
+        for cmd_data in commands:
+            params = cmd_data.copy()
+            command_id = params.pop("id", "unknown")
+            command_type = params.pop("type", "unknown")
+            event = AuditEvent(
+                timestamp=now,
+                event_type=AuditEventType.COMMAND_SUBMITTED,
+                client_id=client_id,
+                session_id=session_id,
+                ip_address=ip_address,
+                details={
+                    "command_id": command_id,
+                    "command_type": command_type,
+                    "params": self._sanitize_params(params),
+                },
+                result="queued",
+            )
+            lines.append(event.to_json())
+
+        try:
+            self._logger.info("\n".join(lines))
+        except Exception:
+            # Don't let audit logging failures affect the application
+            pass
+
     def log_command_executed(
         self,
         client_id: str,
@@ -342,7 +342,7 @@ class FrameStreamer:
 
         self._running = False
         self._task: Optional[asyncio.Task] = None
-        self._frame_callback: Optional[Callable[[str, FrameMetrics], Awaitable[None]]] = None
+        self._frame_callback: Optional[Callable[[bytes, FrameMetrics], Awaitable[None]]] = None
         self._last_frame_time = 0.0
         self._lock = asyncio.Lock()
 
@@ -376,13 +376,13 @@ class FrameStreamer:
 
     def set_frame_callback(
         self,
-        callback: Callable[[str, FrameMetrics], Awaitable[None]],
+        callback: Callable[[bytes, FrameMetrics], Awaitable[None]],
     ) -> None:
         """
         Set callback for frame delivery.
 
         Args:
-            callback: Async function called with (base64_data, metrics).
+            callback: Async function called with (jpeg_bytes, metrics).
         """
         self._frame_callback = callback
 
@@ -431,9 +431,9 @@ class FrameStreamer:
                 quality = self.get_quality()
 
                 # Capture frame in thread pool to avoid blocking
-                b64_data, metrics = await loop.run_in_executor(
+                jpeg_data, metrics = await loop.run_in_executor(
                     None,
-                    self.capture.capture_base64,
+                    self.capture.capture_jpeg,
                     quality,
                     self.scale,
                 )
@@ -448,7 +448,7 @@ class FrameStreamer:
                 # Deliver frame via callback
                 if self._frame_callback:
                     try:
-                        await self._frame_callback(b64_data, metrics)
+                        await self._frame_callback(jpeg_data, metrics)
                     except Exception as e:
                         logger.warning("Frame callback error: %s", e)
 
@@ -472,21 +472,21 @@ class FrameStreamer:
                 logger.error("Capture loop error: %s", e)
                 await asyncio.sleep(0.1)  # Brief pause on error
 
-    async def capture_single_frame(self) -> tuple[str, FrameMetrics]:
+    async def capture_single_frame(self) -> tuple[bytes, FrameMetrics]:
         """
         Capture a single frame outside the streaming loop.
 
         Useful for on-demand screenshots.
 
         Returns:
-            Tuple of (base64_data, metrics).
+            Tuple of (jpeg_bytes, metrics).
         """
         loop = asyncio.get_event_loop()
         quality = self.get_quality()
 
         return await loop.run_in_executor(
             None,
-            self.capture.capture_base64,
+            self.capture.capture_jpeg,
             quality,
             self.scale,
         )
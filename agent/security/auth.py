@@ -1,6 +1,7 @@
 """Token authentication for Lily Remote Agent."""
 
 import hashlib
+import time
 from typing import Optional
 from urllib.parse import parse_qs
 
@@ -17,10 +18,26 @@ _pairing_manager: Optional[PairingManager] = None
 _lan_mode: bool = True
 
 
+# Verified-token cache: token -> (client_id, expires_at). Hashing the
+# token and scanning the paired-client list on every request is the
+# dominant per-request cost for polling clients; tokens are valid for
+# hours, so a short TTL makes repeat verification a dict hit while
+# still picking up pairing changes within a minute.
+_TOKEN_CACHE_TTL = 60.0
+_TOKEN_CACHE_MAX = 256
+_token_cache: dict[str, tuple[str, float]] = {}
+
+
+def invalidate_token_cache() -> None:
+    """Drop all cached token verifications."""
+    _token_cache.clear()
+
+
 def set_pairing_manager(manager: PairingManager) -> None:
     """Set the global pairing manager instance."""
     global _pairing_manager
     _pairing_manager = manager
+    invalidate_token_cache()
 
 
 def get_pairing_manager() -> PairingManager:
@@ -50,12 +67,27 @@ def _verify_token_hash(token: str) -> Optional[str]:
 
     Returns:
         The client_id if token is valid, None otherwise.
+
+    Successful verifications are cached for a short TTL. Failures are
+    never cached, so junk tokens cannot fill the cache and a freshly
+    paired client is accepted immediately.
     """
+    now = time.monotonic()
+    cached = _token_cache.get(token)
+    if cached is not None:
+        client_id, expires_at = cached
+        if now < expires_at:
+            return client_id
+        del _token_cache[token]
+
     manager = get_pairing_manager()
     token_hash = hashlib.sha256(token.encode()).hexdigest()
 
     for client in manager.get_paired_clients():
         if client.token_hash == token_hash:
+            if len(_token_cache) >= _TOKEN_CACHE_MAX:
+                _token_cache.clear()
+            _token_cache[token] = (client.client_id, now + _TOKEN_CACHE_TTL)
             return client.client_id
 
     return None
@@ -0,0 +1,40 @@
+"""Optional build script for Lily Remote.
+
+Lily Remote runs as plain Python and does not need to be built or
+installed as a package - `pip install -r requirements.txt` is enough.
+
+This script exists only to optionally compile the per-request hot
+paths (agent/api/commands.py: validation, param extraction, dispatch;
+agent/api/ratelimit.py: token-bucket checks) to C extensions with
+Cython. If Cython and a C toolchain are available:
+
+    pip install cython
+    python setup.py build_ext --inplace
+
+The compiled module shadows the .py file at import time. If Cython or
+a compiler is missing, nothing is built and the pure-Python module is
+used unchanged - there is no hard dependency on the toolchain.
+"""
+
+from setuptools import setup
+
+ext_modules = []
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
+
+if cythonize is not None:
+    # Compile the existing module in pure-Python mode; no .pyx fork to
+    # maintain, and the source stays runnable everywhere.
+    ext_modules = cythonize(
+        ["agent/api/commands.py", "agent/api/ratelimit.py"],
+        language_level=3,
+    )
+
+setup(
+    name="lily-remote",
+    version="1.0.0",
+    ext_modules=ext_modules,
+)